@@ -2,8 +2,8 @@
 Pathfinding Module
 ------------------
 
-This module contains a pathfinding algorithm for 2D labyrinths represented as numpy arrays.
-It can be imported or run directly. When executed from the terminal, a labyrinth map file
+This module contains a pathfinding algorithm for 2D labyrinths represented as numpy arrays,
+and for volumes of any dimension with the frontier engine. It can be imported or run directly. When executed from the terminal, a labyrinth map file
 can be provided (Python array syntax).
 
 Labyrinth map conventions:
@@ -15,8 +15,17 @@ Labyrinth map conventions:
 The algorithm propagates distances from the start (+1) and finish (-1) simultaneously
 until they meet, then reconstructs the shortest path.
 """
+import functools
+import hashlib
+import inspect
+import itertools
 import numpy as np
+import os
+import sys
 import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from multiprocessing import shared_memory
 
 # -------------------------
 
@@ -26,32 +35,39 @@ import time
 INT_MAX = np.iinfo(np.int64).max
 INT_MIN = np.iinfo(np.int64).min
 
+DISTANCE_DTYPES = (np.int16, np.int32, np.int64)  # candidates for the state, narrowest first
+WINDOW_MIN_CELLS = 10_000  # the dense engine grows smaller maps on the whole map, a window costs more than it saves
+
 # -------------------------
-# Shift functions
+# Workspace
 # -------------------------
-def shift_down(a: np.ndarray) -> np.ndarray:
-    """Return a matrix shifted down by one row; top row is zeros."""
-    out = np.zeros_like(a)
-    out[1:] = a[:-1]
-    return out
+class Workspace:
+    """
+    Preallocated buffers for the propagation loop.
 
-def shift_up(a: np.ndarray) -> np.ndarray:
-    """Return a matrix shifted up by one row; bottom row is zeros."""
-    out = np.zeros_like(a)
-    out[:-1] = a[1:]
-    return out
+    Buffers are keyed by name, shape and dtype and kept between calls, so solving many maps of
+    the same size only allocates them once. A workspace must not be shared by two solves running
+    at the same time.
+    """
 
-def shift_left(a: np.ndarray) -> np.ndarray:
-    """Return a matrix shifted left by one column; rightmost column is zeros."""
-    out = np.zeros_like(a)
-    out[:, :-1] = a[:, 1:]
-    return out
+    def __init__(self):
+        self.buffers = {}
 
-def shift_right(a: np.ndarray) -> np.ndarray:
-    """Return a matrix shifted right by one column; leftmost column is zeros."""
-    out = np.zeros_like(a)
-    out[:, 1:] = a[:, :-1]
-    return out
+    def get(self, name: str, shape: tuple, dtype) -> np.ndarray:
+        """Return the buffer registered under (name, shape, dtype), allocating it on first use. Its content is undefined."""
+        key = (name, tuple(shape), np.dtype(dtype))
+        buffer = self.buffers.get(key)
+        if buffer is None:
+            buffer = self.buffers[key] = np.empty(shape, dtype)
+        return buffer
+
+    def nbytes(self) -> int:
+        """Total size of the buffers held by the workspace."""
+        return sum(buffer.nbytes for buffer in self.buffers.values())
+
+    def clear(self):
+        """Release every buffer."""
+        self.buffers.clear()
 
 # -------------------------
 # Labyrinth generation
@@ -82,53 +98,641 @@ def generate_random_labyrinth(s: int, complexity: float = 0.4) -> np.ndarray:
 # -------------------------
 # Initialization
 # -------------------------
-def initialize(labyrinth_map: np.ndarray) -> tuple[np.ndarray, np.ndarray, float]:
+def distance_dtype(open_cells: int) -> np.dtype:
+    """
+    Return the narrowest signed dtype able to hold every distance of a map.
+
+    A distance can't exceed the number of open cells, and the propagation loop needs
+    room for one more step (distance + 1) on top of it.
     """
-    Prepare the labyrinth for pathfinding.
+    for dtype in DISTANCE_DTYPES:
+        if open_cells + 1 < np.iinfo(dtype).max:
+            return np.dtype(dtype)
+    raise ValueError(f"Labyrinth too large: {open_cells} open cells")
+
+def locate_endpoints(labyrinth_map: np.ndarray, multiple: bool = False) -> tuple[np.ndarray, np.ndarray, float]:
+    """
+    Find the start and the finish of a labyrinth.
 
     Args:
-        labyrinth_map (np.ndarray): 2D map of labyrinth
+        labyrinth_map (np.ndarray): Map of labyrinth, 2D or a volume of any dimension
+        multiple (bool): If True, accept several start and finish cells
 
     Returns:
         tuple:
-            - wall_mask: 1 for empty cells, 0 for walls
-            - initial_state: start = +1, finish = -1, others = 0
-            - min_dist: Manhattan distance / 2 (lower bound for path steps)
+            - start: (row, col) of the start cell, or (n, 2) array of every start cell if multiple
+              (one coordinate per axis for volumes)
+            - finish: (row, col) of the finish cell, or (m, 2) array of every finish cell if multiple
+            - min_dist: Manhattan distance / 2 (lower bound for path steps), the smallest over
+              every (start, finish) pair if multiple
+
+    Raises:
+        ValueError: If the map doesn't contain exactly one start and one finish (at least one of
+            each if multiple)
     """
     start = np.argwhere(labyrinth_map == 2)
     finish = np.argwhere(labyrinth_map == 3)
 
+    if multiple:
+        if not len(start) or not len(finish):
+            raise ValueError("Initialization error: There should be at least one start (2) and one finish (3).")
+
+        # Lower bound over every pair, skipped (0, the collision check runs from the first step) for huge endpoint sets
+        dist = 0
+        if len(start) * len(finish) <= 1 << 20:
+            dist = (np.abs(start[:, None] - finish[None]).sum(axis=2).min() - 1) / 2
+        return start, finish, dist
+
     if len(start) != 1 or len(finish) != 1:
-        return Exception("Initialization error: There should be exactly one start (2) and one finish (3).")
+        raise ValueError("Initialization error: There should be exactly one start (2) and one finish (3).")
 
     start = start[0]
     finish = finish[0]
 
     # expected number of steps before what it is physically impossible for a path to have been found (half of the manathan distance between the end and start)
-    dist = (abs(start[0] - finish[0]) + abs(start[1] - finish[1]) - 1) / 2
+    dist = (np.abs(start - finish).sum() - 1) / 2
+
+    return start, finish, dist
+
+def mark_endpoints(labyrinth_map: np.ndarray, starts=None, finishes=None) -> np.ndarray:
+    """
+    Copy a map with its start or finish cells replaced by lists of coordinates.
+
+    Args:
+        labyrinth_map (np.ndarray): Map of labyrinth, 2D or a volume
+        starts: (row, col) cells to use as start cells instead of the 2s of the map, if given
+        finishes: (row, col) cells to use as finish cells instead of the 3s of the map, if given
+
+    Raises:
+        ValueError: If a cell is a wall, outside the map, or both a start and a finish
+    """
+    marked = labyrinth_map.copy()
+
+    # Clear every replaced endpoint first, so that starts and finishes can be swapped
+    replaced = {}
+    for cells, value in ((starts, 2), (finishes, 3)):
+        if cells is None:
+            continue
+        cells = np.asarray(cells, dtype=np.intp).reshape(-1, labyrinth_map.ndim)
+        inside = (cells >= 0).all(axis=1) & (cells < labyrinth_map.shape).all(axis=1)
+        if not inside.all() or (labyrinth_map[tuple(cells.T)] == 0).any():
+            raise ValueError(f"Initialization error: every {'start' if value == 2 else 'finish'} cell should be an empty cell of the map.")
+        marked[marked == value] = 1
+        replaced[value] = tuple(cells.T)
+
+    for value, cells in replaced.items():
+        if (marked[cells] == 5 - value).any():
+            raise ValueError("Initialization error: a cell can't be both a start and a finish.")
+        marked[cells] = value
+    return marked
+
+def initialize(labyrinth_map: np.ndarray, padded: bool = False) -> tuple[np.ndarray, np.ndarray, float]:
+    """
+    Prepare the labyrinth for pathfinding. The map may contain several start and finish cells.
+
+    Args:
+        labyrinth_map (np.ndarray): Map of labyrinth, 2D or a volume of any dimension
+        padded (bool): If True, surround both matrices with a one-cell border of walls (mask 0, state 0),
+            so the neighbors of every map cell exist and can be taken as slices of the same buffer
+
+    Returns:
+        tuple:
+            - wall_mask: boolean, True for empty cells, False for walls
+            - initial_state: start = +1, finish = -1, others = 0, in the narrowest dtype fitting the map (see `distance_dtype`)
+            - min_dist: Manhattan distance / 2 (lower bound for path steps)
+    """
+    start, finish, dist = locate_endpoints(labyrinth_map, multiple=True)
 
-    wall_mask = np.where(labyrinth_map == 0, 0, 1)
+    wall_mask = labyrinth_map != 0
 
-    initial_state = np.zeros_like(labyrinth_map)
-    initial_state[start[0], start[1]] = 1
-    initial_state[finish[0], finish[1]] = -1
+    initial_state = np.zeros(labyrinth_map.shape, dtype=distance_dtype(np.count_nonzero(wall_mask)))
+    initial_state[tuple(start.T)] = 1
+    initial_state[tuple(finish.T)] = -1
+
+    if padded:
+        wall_mask = np.pad(wall_mask, 1)
+        initial_state = np.pad(initial_state, 1)
 
     return wall_mask, initial_state, dist
 
+def prepare(labyrinth_map: np.ndarray) -> tuple:
+    """
+    Padded `initialize` for the propagation engines, which also gives where the two teams start.
+
+    Returns:
+        tuple:
+            - wall_mask, initial_state, min_dist: see `initialize` with padded=True
+            - origins: flat indices of the start cells and of the finish cells in the padded layout,
+              two sorted arrays
+    """
+    wall_mask, initial_state, dist = initialize(labyrinth_map, padded=True)
+
+    flat_state = initial_state.reshape(-1)
+    origins = (np.flatnonzero(flat_state == 1), np.flatnonzero(flat_state == -1))
+
+    return wall_mask, initial_state, dist, origins
+
+def unpad_cells(cells: np.ndarray, width) -> np.ndarray:
+    """
+    Convert flat indices of the padded layout into an (n, 2) array of map coordinates. `width` is
+    the row length of the padded layout, or its whole shape for volumes (an (n, ndim) array then).
+    """
+    if np.ndim(width):
+        return np.stack(np.unravel_index(cells, width), axis=1) - 1
+    rows, cols = np.divmod(cells, width)
+    return np.stack([rows - 1, cols - 1], axis=1)
+
+def empty_path(ndim: int = 2) -> np.ndarray:
+    """Return the path of a labyrinth without solution: no cell."""
+    return np.empty((0, ndim), dtype=np.intp)
+
+def inner(array: np.ndarray) -> np.ndarray:
+    """Return the view of a padded array without its border."""
+    return array[(slice(1, -1),) * array.ndim]
+
+# -------------------------
+# Moves
+# -------------------------
+CORNER_RULES = ("allow", "no_squeeze", "forbid")
+
+def check_corner(corners: str):
+    """Raise a ValueError for an unknown corner rule."""
+    if corners not in CORNER_RULES:
+        raise ValueError(f"Unknown corner rule '{corners}', expected one of: {', '.join(CORNER_RULES)}")
+
+class Stencil:
+    """
+    Neighborhood of a cell, as the offsets of the moves leaving it, one coordinate per axis of the
+    map: (row, col) in 2D.
+
+    The finish team walks the moves backward, so every move must come with its opposite. The
+    order of the offsets is the order in which the path reconstruction tries the neighbors.
+
+    Args:
+        offsets: Offsets of the moves, e.g. (dr, dc) pairs
+        wrap (bool): If True, the map is a torus: a move leaving one side enters on the other
+
+    Raises:
+        ValueError: If an offset is zero, repeated, has no opposite or not as many coordinates as the others
+    """
+
+    def __init__(self, offsets, wrap: bool = False):
+        self.offsets = tuple(tuple(int(v) for v in offset) for offset in offsets)
+        self.wrap = wrap
+        self.ndim = len(self.offsets[0]) if self.offsets else 0
+
+        moves = set(self.offsets)
+        zero = (0,) * self.ndim
+        if (not moves or zero in moves or len(moves) != len(self.offsets) or any(len(move) != self.ndim for move in moves)
+                or any(tuple(-v for v in move) not in moves for move in moves)):
+            raise ValueError("Stencil error: offsets should be distinct, non-zero, of the same dimension and come with their opposite.")
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, Stencil) and (self.offsets, self.wrap) == (other.offsets, other.wrap)
+
+    def __hash__(self) -> int:
+        return hash((self.offsets, self.wrap))
+
+    def __repr__(self) -> str:
+        return f"Stencil({self.offsets}, wrap={self.wrap})"
+
+    def wrapped(self) -> "Stencil":
+        """Return the same stencil on a torus."""
+        return Stencil(self.offsets, wrap=True)
+
+@functools.lru_cache(maxsize=None)
+def grid_stencil(ndim: int, diagonal: bool = False) -> Stencil:
+    """
+    Return the moves to the 2 * ndim face neighbors of a cell (the negative moves first, then the
+    positive ones, axis by axis), followed by the 3^ndim - 1 - 2 * ndim diagonal ones if `diagonal`.
+    Each stencil is built once and shared.
+    """
+    moves = [tuple(sign if axis == moved else 0 for axis in range(ndim)) for sign in (-1, 1) for moved in range(ndim)]
+    if diagonal:
+        moves += [move for move in itertools.product((-1, 0, 1), repeat=ndim) if np.count_nonzero(move) > 1]
+    return Stencil(moves)
+
+ORTHOGONAL = grid_stencil(2)  # up, left, down, right
+KING = grid_stencil(2, diagonal=True)
+HEX = Stencil(((-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0)))  # hexagonal grid in axial coordinates
+ORTHOGONAL_3D = grid_stencil(3)  # 6 neighbors of a voxel
+KING_3D = grid_stencil(3, diagonal=True)  # 26 neighbors of a voxel
+
+def resolve_stencil(diagonal: bool = False, stencil: Stencil = None, ndim: int = 2) -> Stencil:
+    """Return `stencil` if given, else the stencil of the `diagonal` option for maps of `ndim` dimensions."""
+    if stencil is not None:
+        return stencil
+    return grid_stencil(ndim, diagonal)
+
+def moves_options(engine_options: dict, ndim: int = 2) -> tuple:
+    """Return the (stencil, corners) set by the `diagonal`, `stencil` and `corners` options of an engine."""
+    return resolve_stencil(engine_options.get("diagonal", False), engine_options.get("stencil"), ndim), engine_options.get("corners", "allow")
+
+def check_move_options(engine: str, engine_options: dict):
+    """Raise a ValueError if move options are given to an engine that only moves to the face neighbors."""
+    given = [name for name in MOVE_OPTIONS if name in engine_options]
+    if given and engine not in STENCIL_ENGINES:
+        raise ValueError(f"Engine '{engine}' only moves to the face neighbors, '{given[0]}' needs one of: {', '.join(STENCIL_ENGINES)}")
+
+def flat_strides(shape: tuple) -> tuple:
+    """Return the flat distance between neighbors along each axis of a row-major buffer of this shape."""
+    strides = [1]
+    for n in shape[:0:-1]:
+        strides.append(strides[-1] * n)
+    return tuple(strides[::-1])
+
+class Moves:
+    """
+    A `Stencil` compiled for a padded map: every move becomes a way to find the neighbors of flat
+    indices of the padded layout, computed once so that a step only loops over the moves.
+
+    A move of at most one cell along each axis is a fixed offset of flat indices, since the padded
+    border is a wall, so the neighbors of contiguous cells are a contiguous slice. Longer or
+    wrapping moves get a table of the target of every cell, the border (a wall) for the moves
+    leaving a map without wrap. A one-cell diagonal move can depend on the cells it passes by,
+    reached by a part of its axes (`corners`): "allow" always allows it, "no_squeeze" forbids it
+    when they are all walls, and "forbid" forbids it next to any wall. Both rules give the same
+    answer for a move and its opposite. The cells are read from the wall mask when the move is
+    taken, so the rules cost no memory.
+    Moves into walls are not filtered here.
+
+    Args:
+        wall_mask (np.ndarray): Padded wall mask (see `initialize`), 2D or a volume
+        stencil (Stencil): Moves to compile. Default: the face neighbors (see `grid_stencil`)
+        corners (str): Corner rule of the one-cell diagonal moves. Default "allow"
+
+    Raises:
+        ValueError: If the stencil doesn't have the dimension of the map
+    """
+
+    def __init__(self, wall_mask: np.ndarray, stencil: Stencil = None, corners: str = "allow"):
+        check_corner(corners)
+        if stencil is None:
+            stencil = grid_stencil(wall_mask.ndim)
+        if stencil.ndim != wall_mask.ndim:
+            raise ValueError(f"Stencil error: {stencil.ndim}D moves for a {wall_mask.ndim}D map.")
+
+        self.stencil = stencil
+        self.directions = list(stencil.offsets)
+        self.padded_shape = wall_mask.shape
+        self.shape = tuple(n - 2 for n in wall_mask.shape)
+        self.strides = flat_strides(wall_mask.shape)
+        self.flat_walls = wall_mask.reshape(-1)
+
+        # Side of a pair of cells a meetpoint is reported on: the upper cell, or the right one on the same row
+        self.on_neighbor = [self.reported_on_neighbor(move) for move in self.directions]
+
+        # Largest Manhattan distance covered by one move, no bound at all on a torus
+        self.reach = np.inf if stencil.wrap else max(sum(map(abs, move)) for move in self.directions)
+
+        self.compiled = {}  # move -> (flat offset, target table or None), shared by the moves and the corner checks
+        self.steps = [self.compile(move) for move in self.directions]
+        self.corners = [self.corner_check(move, corners) for move in self.directions]
+        self.opposite = [self.directions.index(tuple(-v for v in move)) for move in self.directions]
+
+        # Direction codes (see `expand_frontier`) are move indices
+        self.code_dtype = np.uint8 if len(self.directions) <= 256 else np.uint16
+
+    @staticmethod
+    def reported_on_neighbor(move: tuple) -> bool:
+        """Return True if a meetpoint across this move is the neighbor (first non-zero axis: negative, or positive on the last axis)."""
+        axis = next(axis for axis, v in enumerate(move) if v)
+        return move[axis] > 0 if axis == len(move) - 1 else move[axis] < 0
+
+    def compile(self, move: tuple) -> tuple:
+        """Return the (flat offset, target table or None) of a move."""
+        if move not in self.compiled:
+            table = None
+            if self.stencil.wrap or max(map(abs, move)) > 1:
+                table = self.target_table(move)
+            self.compiled[move] = (sum(v * stride for v, stride in zip(move, self.strides)), table)
+        return self.compiled[move]
+
+    def corner_check(self, move: tuple, corners: str):
+        """Return (combine, steps to the cells passed by) for a diagonal move restricted by `corners`, else None."""
+        if corners == "allow":
+            return None
+        axes = np.flatnonzero(move)
+        if len(axes) < 2 or max(map(abs, move)) > 1:
+            return None
+        parts = [tuple(move[axis] if axis in part else 0 for axis in range(len(move))) for size in range(1, len(axes)) for part in itertools.combinations(axes, size)]
+        return (np.logical_or if corners == "no_squeeze" else np.logical_and), [self.compile(part) for part in parts]
+
+    def target_table(self, move: tuple) -> np.ndarray:
+        """Return the flat index reached from every cell of the padded layout by a move, 0 (a wall) if it leaves the map."""
+        target = np.zeros(self.padded_shape, dtype=np.intp)
+        inside = np.ones(self.padded_shape, dtype=bool)
+        for axis, (n, v, stride) in enumerate(zip(self.shape, move, self.strides)):
+            shape = [1] * len(move)
+            shape[axis] = n + 2
+            coords = np.arange(-1, n + 1)  # map coordinates along the axis, the border is at -1 and n
+            valid = (coords >= 0) & (coords < n)
+            coords = coords + v
+            if self.stencil.wrap:
+                coords %= n
+            else:
+                valid &= (coords >= 0) & (coords < n)
+            target += ((coords + 1) * stride).reshape(shape)
+            inside &= valid.reshape(shape)
+        return np.where(inside, target, 0).reshape(-1)
+
+    @staticmethod
+    def jump(step: tuple, cells):
+        """Apply a compiled move to flat indices (or a single index)."""
+        offset, table = step
+        return cells + offset if table is None else table[cells]
+
+    def move(self, k: int, cells):
+        """Return the cells reached by move k from the given ones (flat indices, or a single index)."""
+        return self.jump(self.steps[k], cells)
+
+    def allowed(self, k: int, cells):
+        """Return whether move k is allowed from each of the given cells, None if it always is."""
+        check = self.corners[k]
+        if check is None:
+            return None
+        combine, parts = check
+        return combine.reduce([self.flat_walls[self.jump(part, cells)] for part in parts])
+
+    def reached(self, cells: np.ndarray) -> list:
+        """
+        Return the cells one allowed move away from the given ones, walls included, as one array per
+        move: array k holds the cells from which move k leads back to one of the given cells.
+        """
+        found = []
+        for k in self.opposite:
+            allowed = self.allowed(k, cells)
+            found.append(self.move(k, cells if allowed is None else cells[allowed]))
+        return found
+
+    def lower_bound(self, min_dist: float) -> float:
+        """Convert the Manhattan bound of `locate_endpoints` into a bound on the steps with these moves."""
+        return ((2 * min_dist + 1) / self.reach - 1) / 2
+
+def stencil_offsets(shape: tuple, stencil: Stencil = ORTHOGONAL) -> list:
+    """Return the flat offset of each move of a stencil in a row-major buffer of this (padded) shape, in the stencil order."""
+    strides = flat_strides(shape)
+    return [sum(v * stride for v, stride in zip(move, strides)) for move in stencil.offsets]
+
+def reporting_moves(stencil: Stencil = ORTHOGONAL) -> list:
+    """Return the indices of the moves whose meetpoints are reported on the cell they start from (see `Moves.reported_on_neighbor`)."""
+    return [k for k, move in enumerate(stencil.offsets) if not Moves.reported_on_neighbor(move)]
+
+class MovesState:
+    """
+    Result of an engine run following `Moves`: the padded signed state, the moves used, which the
+    reconstruction has to follow, and the direction codes recorded during the propagation if any
+    (see `expand_frontier`).
+    """
+
+    def __init__(self, state: np.ndarray, moves: Moves, codes: np.ndarray = None):
+        self.state = state
+        self.moves = moves
+        self.codes = codes
+
+    def closest(self, cell: int, sign: int) -> int:
+        """Return the allowed neighbor of a cell on the side of `sign` closest to its origin, the first one in the move order on a tie."""
+        flat_state = self.state.reshape(-1)
+        best = None
+        for k in range(len(self.moves.directions)):
+            allowed = self.moves.allowed(k, cell)
+            if allowed is not None and not allowed:
+                continue
+            neighbor = self.moves.move(k, cell)
+            val = flat_state[neighbor] * sign
+            if val > 0 and (best is None or val < best[1]):
+                best = (neighbor, val)
+        return int(best[0])
+
+    def reconstruct_path(self, meetpoint) -> np.ndarray:
+        """
+        Same walk as `reconstruct_path`, trying the allowed moves in their order.
+
+        With direction codes, only the first move across the meetpoint looks at the neighbors: every
+        other cell gives its previous cell directly, and the number of cells left is its distance.
+        """
+        flat_state = self.state.reshape(-1)
+        origin = int(np.ravel_multi_index(tuple(int(v) + 1 for v in meetpoint), self.state.shape))
+
+        cells = []
+        for sign in (1, -1):
+            cell = origin
+            half = []
+            if self.codes is not None:
+                if flat_state[cell] * sign < 0:
+                    cell = self.closest(cell, sign)
+                    half.append(cell)
+                for _ in range(abs(int(flat_state[cell])) - 1):
+                    cell = int(self.moves.move(self.codes[cell], cell))
+                    half.append(cell)
+            else:
+                while flat_state[cell] != sign:
+                    cell = self.closest(cell, sign)
+                    half.append(cell)
+
+            cells = half[::-1] + [origin] if sign == 1 else cells + half
+
+        return unpad_cells(np.array(cells), self.state.shape)
+
+# -------------------------
+# Connected components
+# -------------------------
+def label_components(wall_mask: np.ndarray, diagonal: bool = False, corners: str = "allow", stencil: Stencil = None) -> np.ndarray:
+    """
+    Label the connected regions of empty cells (4-connectivity by default).
+
+    Vectorized union-find: at each round, every pair of adjacent empty cells in two different
+    regions hooks the root with the larger index under the smaller one, then pointer jumping
+    flattens the trees. Pairs already in the same region are dropped, so the rounds get cheaper,
+    and their number grows with the log of the region sizes rather than with their diameter.
+
+    Args:
+        wall_mask (np.ndarray): Mask, non-zero for empty cells (see `initialize`), 2D or a volume
+        diagonal (bool): If True, diagonal neighbors are connected too
+        corners (str): Corner rule of the diagonal moves, see `Moves`
+        stencil (Stencil): Neighborhood to use instead, see `resolve_stencil`
+
+    Returns:
+        np.ndarray: Label of each cell (the smallest flat index of its region), -1 for walls
+    """
+    empty = wall_mask != 0
+
+    # Pairs of empty cells one move apart, in the padded layout, each pair once (the stencils are symmetric)
+    padded = np.pad(empty, 1)
+    flat_empty = padded.reshape(-1)
+    moves = Moves(padded, resolve_stencil(diagonal, stencil, empty.ndim), corners)
+    cells = np.flatnonzero(flat_empty)
+    pairs = []
+    for k, move in enumerate(moves.directions):
+        if move > (0,) * empty.ndim:
+            allowed = moves.allowed(k, cells)
+            a = cells if allowed is None else cells[allowed]
+            b = moves.move(k, a)
+            pairs.append((a[flat_empty[b]], b[flat_empty[b]]))
+    a = np.concatenate([pair[0] for pair in pairs])
+    b = np.concatenate([pair[1] for pair in pairs])
+
+    parent = np.arange(padded.size)
+    while len(a):
+        root_a, root_b = parent[a], parent[b]
+        apart = root_a != root_b
+        if not apart.any():
+            break
+        a, b, root_a, root_b = a[apart], b[apart], root_a[apart], root_b[apart]
+
+        # Hook the larger root under the smaller one, roots only ever point to smaller indices
+        np.minimum.at(parent, np.maximum(root_a, root_b), np.minimum(root_a, root_b))
+
+        # Pointer jumping until every cell points to its root
+        while True:
+            grandparent = parent[parent]
+            if np.array_equal(grandparent, parent):
+                break
+            parent = grandparent
+
+    # Roots are padded indices, which keep the row-major order of the map cells
+    roots = np.unravel_index(inner(parent.reshape(padded.shape)), padded.shape)
+    labels = np.ravel_multi_index(tuple(coords - 1 for coords in roots), empty.shape)
+    labels[~empty] = -1
+    return labels
+
+class ComponentCache:
+    """
+    Least recently used cache of `label_components` results, keyed by the wall layout of the map.
+
+    Hashing the packed wall mask is much cheaper than labeling it again, so solving the same map
+    several times only labels it once.
+    """
+
+    def __init__(self, max_entries: int = 16):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+
+    def labels(self, wall_mask: np.ndarray, diagonal: bool = False, corners: str = "allow", stencil: Stencil = None) -> np.ndarray:
+        """Return the component labels of a wall mask, computing them on a miss (see `label_components` for the moves)."""
+        empty = wall_mask != 0
+        stencil = resolve_stencil(diagonal, stencil, empty.ndim)
+        key = (empty.shape, stencil, corners, hashlib.blake2b(np.packbits(empty).tobytes(), digest_size=16).digest())
+
+        labels = self.entries.get(key)
+        if labels is None:
+            labels = self.entries[key] = label_components(empty, corners=corners, stencil=stencil)
+            if len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+        else:
+            self.entries.move_to_end(key)
+        return labels
+
+COMPONENTS = ComponentCache()
+
+def same_component(labyrinth_map: np.ndarray, cache: ComponentCache = COMPONENTS, diagonal: bool = False, corners: str = "allow", stencil: Stencil = None) -> bool:
+    """Return True if a start and a finish are in the same region of empty cells."""
+    start, finish, _ = locate_endpoints(labyrinth_map, multiple=True)
+    labels = cache.labels(labyrinth_map != 0, diagonal, corners, stencil)
+    return bool(np.isin(labels[tuple(start.T)], labels[tuple(finish.T)]).any())
+
+# -------------------------
+# Wavefront tracking
+# -------------------------
+class Wavefronts:
+    """
+    Sizes and extents of both wavefronts, updated from the cells added at each step.
+
+    The extents are the largest distance reached by each team (positive for the start team,
+    negative for the finish team). Keeping them up to date from the number of new cells makes
+    the dead-end test O(1) instead of two reductions over the whole state.
+    """
+
+    def __init__(self, start_cells: int = 1, finish_cells: int = 1):
+        self.pos_sizes = [start_cells]  # number of cells added to the start team at each step
+        self.neg_sizes = [finish_cells]  # number of cells added to the finish team at each step
+        self.max_pos = 1
+        self.min_neg = -1
+        self.prev_max_pos = 0
+        self.prev_min_neg = 0
+
+    def update(self, step: int, added_pos: int, added_neg: int) -> bool:
+        """
+        Record the cells added during a step.
+
+        Returns:
+            bool: True if the search reached a dead end, meaning there is no solution
+        """
+        self.pos_sizes.append(int(added_pos))
+        self.neg_sizes.append(int(added_neg))
+
+        if added_pos:
+            self.max_pos = step
+        if added_neg:
+            self.min_neg = -step
+
+        # A team that stopped growing (or both) means there is no path
+        stalled = abs(self.max_pos + self.min_neg) > 1 or (self.min_neg == self.prev_min_neg and self.max_pos == self.prev_max_pos)
+
+        self.prev_max_pos = self.max_pos
+        self.prev_min_neg = self.min_neg
+
+        return stalled
+
+def frontier_meetpoints(cells: np.ndarray, state: np.ndarray, moves: Moves) -> np.ndarray:
+    """
+    Find every meetpoint involving the given cells.
+
+    A pair of adjacent cells of opposite signs is reported on the upper cell for a vertical
+    pair and on the right cell for a horizontal one (see `Moves.reported_on_neighbor`), the
+    same cell as the whole-map check of `find_shortest_path_batch`. Diagonal pairs are reported
+    on the upper cell. The dense, frontier, tiled and striped engines look for their meetpoints
+    here, among the cells added during the last step.
+
+    Args:
+        moves (Moves): Moves connecting the cells, `Moves(wall_mask)` for the four orthogonal moves
+
+    Returns:
+        np.ndarray: Flat indices of the meetpoints in the padded layout, in row-major order
+    """
+    value = state[cells]
+
+    # (neighbors, is the meetpoint the neighbor?, cells the move is allowed from)
+    pairs = ((moves.move(k, cells), moves.on_neighbor[k], moves.allowed(k, cells)) for k in range(len(moves.directions)))
+
+    found = []
+    for neighbors, on_neighbor, allowed in pairs:
+        other = state[neighbors]
+        hit = ((other ^ value) < 0) & (other != 0)  # opposite signs, without the overflow of a product
+        if allowed is not None:
+            hit &= allowed
+        found.append(neighbors[hit] if on_neighbor else cells[hit])
+
+    return np.unique(np.concatenate(found))
+
 # -------------------------
 # Pathfinder
 # -------------------------
-def find_shortest_path(labyrinth_map: np.ndarray, visualize_freq: int = -1, states: list = None) -> tuple:
+def find_shortest_path(labyrinth_map: np.ndarray, visualize_freq: int = -1, states: list = None, engine: str = "dense", select_meetpoint=None, components: bool = False, starts=None, finishes=None, **engine_options) -> tuple:
     """
     Find the shortest path from start to finish.
 
+    The map may contain several start (2) and finish (3) cells, the path then goes from the start
+    to the finish closest to each other, still in a single propagation.
+
     Args:
         labyrinth_map (np.ndarray): Labyrinth map
         visualize_freq (bool): If True, store states for visualization
+        engine (str): Propagation engine to use, one of the keys of ENGINES. Default "dense"
+        select_meetpoint (callable): Receives the (n, 2) array of every meetpoint found, in row-major
+            order, and returns the one to build the path from. Default: the first one of the shortest
+            paths (see `meetpoint_lengths`)
+        components (bool): If True, first check that the start and the finish are in the same region
+            (see `same_component`, the labels are cached per map and moves) and return without propagating if not
+        starts: (row, col) cells used as start cells instead of the 2s of the map (see `mark_endpoints`)
+        finishes: (row, col) cells used as finish cells instead of the 3s of the map
+        **engine_options: Extra keyword arguments given to the engine (e.g. `workspace` for "dense"), the
+            move options (`diagonal`, `corners`, `stencil`) only with an engine of STENCIL_ENGINES
 
     Returns:
         tuple:
-            - path (list of tuples) or None
+            - path: (length, 2) array of the map coordinates of the cells, from start to finish,
+              (length, ndim) for volumes, empty if there is no path
             - propagation_time (ns)
             - reconstruction_time (ns)
             - steps (int)
@@ -138,7 +742,20 @@ def find_shortest_path(labyrinth_map: np.ndarray, visualize_freq: int = -1, stat
 
     meetpoints = [] # This array will contain the list of meetpoints
 
-    path_found, state, step_taken = propagate_distances_through_map(labyrinth_map, meetpoints, visualize_freq, states)
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown engine '{engine}', expected one of: {', '.join(ENGINES)}")
+    if labyrinth_map.ndim != 2 and engine not in VOLUME_ENGINES:
+        raise ValueError(f"Engine '{engine}' only solves 2D maps, use one of: {', '.join(VOLUME_ENGINES)}")
+    check_move_options(engine, engine_options)
+
+    if starts is not None or finishes is not None:
+        labyrinth_map = mark_endpoints(labyrinth_map, starts, finishes)
+
+    stencil, corners = moves_options(engine_options, labyrinth_map.ndim)
+    if components and not same_component(labyrinth_map, corners=corners, stencil=stencil):
+        return empty_path(labyrinth_map.ndim), time.time_ns() - start_time, 0, 0
+
+    path_found, state, step_taken = ENGINES[engine](labyrinth_map, meetpoints, visualize_freq, states, **engine_options)
 
 
     # -------------------------
@@ -146,112 +763,1873 @@ def find_shortest_path(labyrinth_map: np.ndarray, visualize_freq: int = -1, stat
     # -------------------------
     elapsed1 = time.time_ns() - start_time
     start_time = time.time_ns()
-    path = []
+    path = empty_path(labyrinth_map.ndim)
 
     if path_found:
-        s = state.shape 
-
-        # We could choose a random meetpoint here but decided to go with the first one
-        x, y = int(meetpoints[0][0]), int(meetpoints[0][1])
-        path.append((x, y, state[x, y]))
-
-        # From meetpoint to start
-        while state[x, y] != 1:
-            smallest = ((0, 0), np.inf)
-            neighbors = []
-            if x >= 1: neighbors.append((x-1, y))
-            if y >= 1: neighbors.append((x, y-1))
-            if x < s[0]-1: neighbors.append((x+1, y))
-            if y < s[1]-1: neighbors.append((x, y+1))
-
-            for i, j in neighbors:
-                val = state[i, j]
-                if val > 0 and val < smallest[1]:
-                    smallest = ((i, j), val)
-
-            x, y = smallest[0]
-            path.append((x, y, state[x, y]))
-        path.reverse()
+        # Unless the caller chooses, we go with the first meetpoint of the shortest paths
+        meetpoint = shortest_meetpoint(state, meetpoints) if select_meetpoint is None else select_meetpoint(np.array(meetpoints))
 
-        # From meetpoint to finish
-        x, y = int(meetpoints[0][0]), int(meetpoints[0][1])
-        while state[x, y] != -1:
-            largest = ((0, 0), -1000000000) # magic number because for some reaason -np.inf doesn't work
-            neighbors = []
-            if x >= 1: neighbors.append((x-1, y))
-            if y >= 1: neighbors.append((x, y-1))
-            if x < s[0]-1: neighbors.append((x+1, y))
-            if y < s[1]-1: neighbors.append((x, y+1))
-
-            for i, j in neighbors:
-                val = state[i, j]
-                if val < 0 and val > largest[1]:
-                    largest = ((i, j), val)
-
-            x, y = largest[0]
-            path.append((x, y, state[x, y]))
+        if isinstance(state, (PackedState, WeightedState, MovesState)):
+            path = state.reconstruct_path(meetpoint)
+        else:
+            path = reconstruct_path(state, meetpoint)
 
     elapsed2 = time.time_ns() - start_time
     return path, elapsed1, elapsed2, step_taken
 
 
-def propagate_distances_through_map(labyrinth_map: np.ndarray, meetpoints: list, visualize_freq: int, states: list) -> tuple:
+def meetpoint_lengths(state, meetpoints: np.ndarray) -> np.ndarray:
+    """
+    Count the cells of the shortest path through each meetpoint.
+
+    With a single start and finish and orthogonal moves, every meetpoint found during a step gives
+    a path of the same length since the grid is bipartite. With several of them, or with diagonal
+    moves, paths can differ by one cell.
 
-    wall_mask, state, min_dist = initialize(labyrinth_map)
+    Args:
+        state: Padded signed distance matrix, `PackedState`, `WeightedState` or `MovesState` returned by a propagation engine
+        meetpoints (np.ndarray): (n, 2) map coordinates of the meetpoints, (n, ndim) for volumes
+
+    Returns:
+        np.ndarray: Path length of each meetpoint (path cost for the weighted engine)
+    """
+    neighbors = ORTHOGONAL.offsets
+
+    if isinstance(state, MovesState):
+        flat_state = state.state.reshape(-1)
+        cells = np.ravel_multi_index(tuple(meetpoints.T + 1), state.state.shape)
+        value = flat_state[cells].astype(np.int64)
+        closest = np.full(len(cells), INT_MAX)
+        for k in range(len(state.moves.directions)):
+            other = flat_state[state.moves.move(k, cells)].astype(np.int64)
+            across = other * value < 0
+            allowed = state.moves.allowed(k, cells)
+            if allowed is not None:
+                across &= allowed
+            closest = np.where(across, np.minimum(closest, np.abs(other)), closest)
+        return np.abs(value) + closest
+
+    if isinstance(state, PackedState):
+        lengths = []
+        for x, y in meetpoints.tolist():
+            value = state.value(x, y, state.step)
+            across = (state.value(x + i, y + j, state.step) for i, j in neighbors)
+            lengths.append(abs(value) + min(abs(other) for other in across if other * value < 0))
+        return np.array(lengths)
+
+    # Padded coordinates, every meetpoint has its four neighbors and at least one of the other team
+    rows, cols = meetpoints[:, 0] + 1, meetpoints[:, 1] + 1
+    if isinstance(state, WeightedState):
+        return state.forward[rows, cols].astype(np.int64) + state.backward[rows, cols]  # all of them are on the cheapest paths
+
+    value = state[rows, cols].astype(np.int64)
+    across = [state[rows + i, cols + j].astype(np.int64) for i, j in neighbors]
+    closest = np.min([np.where(other * value < 0, np.abs(other), INT_MAX) for other in across], axis=0)
+    return np.abs(value) + closest
+
+def shortest_meetpoint(state, meetpoints: list):
+    """Return the first meetpoint, in row-major order, of the shortest paths (see `meetpoint_lengths`)."""
+    if len(meetpoints) == 1:
+        return meetpoints[0]
+    return meetpoints[int(np.argmin(meetpoint_lengths(state, np.array(meetpoints))))]
+
+def reconstruct_path(state: np.ndarray, meetpoint) -> np.ndarray:
+    """
+    Walk from a meetpoint down to the start and to the finish.
+
+    Args:
+        state (np.ndarray): Padded signed distance matrix returned by a propagation engine
+        meetpoint: (row, col) map coordinates of a meetpoint
+
+    Returns:
+        np.ndarray: (length, 2) map coordinates of the cells, from start to finish
+    """
+    # The border of the padded state is 0, every map cell has its four neighbors without bound checks
+    width = state.shape[1]
+    flat_state = state.reshape(-1)
+    offsets = [dr * width + dc for dr, dc in ORTHOGONAL.offsets]
+    origin = (int(meetpoint[0]) + 1) * width + int(meetpoint[1]) + 1
+
+    # From meetpoint to start through the smallest positive distances, then to finish through the largest negative ones
+    cells = []
+    for sign in (1, -1):
+        cell = origin
+        half = []
+        while flat_state[cell] != sign:
+            best = None
+            for offset in offsets:
+                val = int(flat_state[cell + offset]) * sign
+                if val > 0 and (best is None or val < best[1]):
+                    best = (cell + offset, val)
+            cell = best[0]
+            half.append(cell)
+
+        cells = half[::-1] + [origin] if sign == 1 else cells + half
+
+    return unpad_cells(np.array(cells), width)
+
+
+def window_views(state: np.ndarray, wall_mask: np.ndarray, box: tuple, allow_flat: bool = True) -> tuple:
+    """
+    Take the cells of a box of the padded layout and their neighbors as views, no copy is made.
+
+    Wide boxes are taken as one contiguous span of the flat buffer, which NumPy processes faster
+    than a strided 2D view. The span also covers cells outside the box, which is harmless as long
+    as those cells have no neighbor in the team being grown.
+
+    Args:
+        state (np.ndarray): Padded signed distance matrix
+        wall_mask (np.ndarray): Padded wall mask
+        box (tuple): (row_start, row_stop, col_start, col_stop) in padded coordinates, inside the border
+        allow_flat (bool): If False, always return 2D views
+
+    Returns:
+        tuple:
+            - cells: view of the cells of the box
+            - walls: view of the wall mask on the same cells
+            - neighbors: views of the neighbors across each move of ORTHOGONAL, in its order
+            - origin: (flat index of the first cell, row length of the view or 0 for a flat span),
+              see `window_cells`
+    """
+    r0, r1, c0, c1 = box
+    width = state.shape[1]
+
+    if allow_flat and 2 * (c1 - c0) >= width:
+        flat_state = state.reshape(-1)
+        start, stop = r0 * width + c0, (r1 - 1) * width + c1
+        neighbors = tuple(flat_state[start + offset:stop + offset] for offset in stencil_offsets(state.shape))
+        return flat_state[start:stop], wall_mask.reshape(-1)[start:stop], neighbors, (start, 0)
+
+    neighbors = tuple(state[r0 + dr:r1 + dr, c0 + dc:c1 + dc] for dr, dc in ORTHOGONAL.offsets)
+    return state[r0:r1, c0:c1], wall_mask[r0:r1, c0:c1], neighbors, (r0 * width + c0, c1 - c0)
+
+def window_cells(mask: np.ndarray, origin: tuple, width: int) -> np.ndarray:
+    """Return the flat padded indices of the cells set in a mask shaped like a `window_views` view."""
+    start, row_length = origin
+    cells = np.flatnonzero(mask)
+    if row_length:
+        rows, cols = np.divmod(cells, row_length)
+        cells = rows * width + cols
+    return cells + start
+
+def propagate_distances_through_map(labyrinth_map: np.ndarray, meetpoints: list, visualize_freq: int, states: list, workspace: Workspace = None, problem: tuple = None) -> tuple:
+
+    wall_mask, state, min_dist, origins = prepare(labyrinth_map) if problem is None else problem
+
+    if workspace is None:
+        workspace = Workspace()
+
+    height, width = state.shape
+    flat_state = state.reshape(-1)
+    moves = Moves(wall_mask)  # meetpoints are found across the four orthogonal moves
+
+    # Every window-sized temporary of the loop lives in the workspace and is written with out=, a step only
+    # allocates arrays of the new cells (`window_cells`, `frontier_meetpoints`).
+    # A window uses the beginning of each buffer.
+    size = state.size
+    best_buffer = workspace.get("best", (size,), state.dtype)
+    worst_buffer = workspace.get("worst", (size,), state.dtype)
+    mask_buffer = workspace.get("mask", (size,), bool)
+    free_buffer = workspace.get("free", (size,), bool)
 
     path_found = False
     step = 1
 
 
-    if visualize_freq:
-        states.append(state.copy())
+    if visualize_freq > 0:
+        states.append(state[1:-1, 1:-1].copy())
+
+    fronts = Wavefronts(*map(len, origins))
+    recent = np.concatenate(origins)  # cells added during the last step, in the flat padded layout
+
+    # Bounding box of the cells reached by each team, in padded coordinates (row_start, row_stop, col_start, col_stop).
+    # Only the box grown by one cell can receive new cells, so the whole step runs on that window.
+    boxes = []
+    for cells in origins:
+        rows, cols = np.divmod(cells, width)
+        boxes.append([rows.min(), rows.max() + 1, cols.min(), cols.max() + 1])
+
+    # Once the grown boxes overlap or cover half of the map, a window per team saves less than its bookkeeping
+    # costs, so both teams grow in a single pass over the whole core until the end, from the start on small maps
+    core = window_views(state, wall_mask, (1, height - 1, 1, width - 1))
+    whole = core[0].size <= WINDOW_MIN_CELLS
 
-    prev_min_neg = 0
-    prev_max_pos = 0
+    # Sentinels of the state dtype, which is as narrow as the map allows
+    dtype_max = np.iinfo(state.dtype).max
+    dtype_min = np.iinfo(state.dtype).min
 
     while not path_found:
-        up = shift_up(state)
-        right = shift_right(state)
+        # Check for collision (start/finish fronts meet), a new meetpoint always involves a cell added
+        # during the last step so only those and their neighbors are tested
+        if step >= min_dist:
+            found = frontier_meetpoints(recent, flat_state, moves)
+            if len(found):
+                path_found = True
+                meetpoints.extend(unpad_cells(found, width))
+                break
+
+        if not whole:
+            windows = [(max(r0 - 1, 1), min(r1 + 1, height - 1), max(c0 - 1, 1), min(c1 + 1, width - 1)) for r0, r1, c0, c1 in boxes]
+            (a0, a1, b0, b1), (c0, c1, d0, d1) = windows
+            overlap = a0 < c1 and c0 < a1 and b0 < d1 and d0 < b1
+            whole = overlap or 2 * sum((r1 - r0) * (k1 - k0) for r0, r1, k0, k1 in windows) >= core[0].size
+
+        # Propagate distances, the positive team goes first so it wins contested cells
+        added = []
+        if whole:
+            inner, inner_walls, neighbors, origin = core
+            best, worst = best_buffer[:inner.size].reshape(inner.shape), worst_buffer[:inner.size].reshape(inner.shape)
+            mask, free = mask_buffer[:inner.size].reshape(inner.shape), free_buffer[:inner.size].reshape(inner.shape)
+
+            # Closest neighbor of each team: smallest positive and largest negative value
+            best.fill(dtype_max)
+            worst.fill(dtype_min)
+            for neighbor in neighbors:
+                np.greater(neighbor, 0, out=mask)
+                np.minimum(best, neighbor, out=best, where=mask)
+                np.less(neighbor, 0, out=mask)
+                np.maximum(worst, neighbor, out=worst, where=mask)
+
+            # Only update empty cells, the cells taken by the positive team are no longer free
+            np.equal(inner, 0, out=free)
+            np.logical_and(free, inner_walls, out=free)
+            for sign, closest, sentinel in ((1, best, dtype_max), (-1, worst, dtype_min)):
+                np.not_equal(closest, sentinel, out=mask)
+                np.logical_and(mask, free, out=mask)
+                np.add(closest, sign, out=inner, where=mask)
+                added.append(window_cells(mask, origin, width))
+                if sign > 0:
+                    np.logical_and(free, np.logical_not(mask, out=mask), out=free)
+        else:
+            for sign, box, window in zip((1, -1), boxes, windows):
+                inner, inner_walls, neighbors, origin = window_views(state, wall_mask, window)
+
+                best = best_buffer[:inner.size].reshape(inner.shape)
+                mask = mask_buffer[:inner.size].reshape(inner.shape)
+                free = free_buffer[:inner.size].reshape(inner.shape)
+
+                # Closest neighbor of the team: smallest positive or largest negative value
+                sentinel = dtype_max if sign > 0 else dtype_min
+                compare, closest = (np.greater, np.minimum) if sign > 0 else (np.less, np.maximum)
+                best.fill(sentinel)
+                for neighbor in neighbors:
+                    compare(neighbor, 0, out=mask)
+                    closest(best, neighbor, out=best, where=mask)
+
+                # Only update empty cells
+                np.equal(inner, 0, out=free)
+                np.logical_and(free, inner_walls, out=free)
+                np.not_equal(best, sentinel, out=mask)
+                np.logical_and(mask, free, out=mask)
+                np.add(best, sign, out=inner, where=mask)
+
+                new = window_cells(mask, origin, width)
+                added.append(new)
+                if len(new):
+                    r0, r1, c0, c1 = box
+                    rows, cols = np.divmod(new, width)
+                    box[:] = min(r0, rows.min()), max(r1, rows.max() + 1), min(c0, cols.min()), max(c1, cols.max() + 1)
+
+        recent = np.concatenate(added)
 
-        # Check for collision (start/finish fronts meet)
+        step += 1
+
+        if visualize_freq > 0 and step % visualize_freq == 0:
+            states.append(state[1:-1, 1:-1].copy())
+
+        # Check for no progress, meaning no solution
+        if fronts.update(step, len(added[0]), len(added[1])):
+            break
+
+    return path_found, state, step
+
+
+# -------------------------
+# Frontier engine
+# -------------------------
+def expand_frontier(cells: np.ndarray, state: np.ndarray, wall_mask: np.ndarray, moves: Moves, codes: np.ndarray = None) -> np.ndarray:
+    """
+    Gather the unreached empty cells next to a frontier.
+
+    Args:
+        cells (np.ndarray): Flat indices of the frontier cells in the padded layout
+        state (np.ndarray): Flattened padded signed distance matrix
+        wall_mask (np.ndarray): Flattened padded wall mask
+        moves (Moves): Moves connecting the cells, `Moves(wall_mask)` for the four orthogonal moves
+        codes (np.ndarray): Flat direction codes, if given the code of each new cell is set to the
+            move leading back to the frontier, the first one in the move order like the path
+            reconstruction would pick
+
+    Returns:
+        np.ndarray: Flat indices of the new cells, sorted in row-major order
+    """
+    # The padded border is a wall, so no bound checks are needed. Array k is reached from the cell by the opposite of move k
+    reached = moves.reached(cells)
+    neighbors = np.concatenate(reached)
+    free = (state[neighbors] == 0) & (wall_mask[neighbors] != 0)
+
+    if codes is None:
+        return np.unique(neighbors[free])  # a cell can be the neighbor of several frontier cells
+
+    # The first occurrence of a cell comes from the first move leading back
+    new, first = np.unique(neighbors[free], return_index=True)
+    directions = np.repeat(np.arange(len(reached), dtype=codes.dtype), [len(cells) for cells in reached])
+    codes[new] = directions[free][first]
+    return new
+
+def propagate_frontier(labyrinth_map: np.ndarray, meetpoints: list, visualize_freq: int, states: list, diagonal: bool = False, corners: str = "allow", stencil: Stencil = None, moves: Moves = None, problem: tuple = None) -> tuple:
+    """
+    Same propagation as `propagate_distances_through_map` but only the frontier cells of each
+    team are expanded, so a step costs O(frontier) instead of O(H*W).
+
+    Other neighborhoods go through the same loop, compiled once into `Moves`. With diagonal moves,
+    a step expands twice as many neighbors but paths take fewer steps. The result is then a
+    `MovesState`, so that the path only uses allowed moves. Volumes of any dimension are solved the
+    same way, with the 2 * ndim face neighbors by default (6 for voxels), and the state keeps the
+    compact dtype of `initialize`: a step never holds more than the neighbors of its frontier.
+
+    Each new cell records the move leading back to the previous cell of its team in a direction
+    code, one byte per cell, so the path is read back in O(length) without looking at neighbors.
+
+    Args:
+        diagonal (bool): If True, cells are also connected to their diagonal neighbors (the KING
+            stencil, or all 26 neighbors of a voxel)
+        corners (str): Corner rule of the diagonal moves, see `Moves`. Default "allow"
+        stencil (Stencil): Neighborhood to use instead, e.g. HEX or `ORTHOGONAL.wrapped()`
+        moves (Moves): Moves already compiled on the padded wall mask of the problem, which then
+            replace `diagonal`, `corners` and `stencil`. Used by `Labyrinth` to compile them once
+    """
+    wall_mask, state, min_dist, origins = prepare(labyrinth_map) if problem is None else problem
+
+    if moves is None:
+        moves = Moves(wall_mask, resolve_stencil(diagonal, stencil, state.ndim), corners)
+    min_dist = moves.lower_bound(min_dist)
+
+    # Work on flat views of the padded buffers, a neighbor is a fixed offset away
+    flat_state = state.reshape(-1)
+    flat_walls = wall_mask.reshape(-1)
+    codes = np.empty(state.size, dtype=moves.code_dtype)  # only read on reached cells
+
+    path_found = False
+    step = 1
+
+    pos_cells, neg_cells = origins
+
+    if visualize_freq > 0:
+        states.append(inner(state).copy())
+
+    fronts = Wavefronts(*map(len, origins))
+
+    while not path_found:
+        # Check for collision, only the cells added during the last step can create a new one
         if step >= min_dist:
-            collision = (up * state < 0) | (right * state < 0)
+            found = frontier_meetpoints(np.concatenate([pos_cells, neg_cells]), flat_state, moves)
+            if len(found):
+                path_found = True
+                meetpoints.extend(unpad_cells(found, state.shape))
+                break
+
+        # Propagate distances, the start team claims contested cells first like in the dense engine
+        pos_cells = expand_frontier(pos_cells, flat_state, flat_walls, moves, codes)
+        flat_state[pos_cells] = step + 1
+
+        neg_cells = expand_frontier(neg_cells, flat_state, flat_walls, moves, codes)
+        flat_state[neg_cells] = -(step + 1)
+
+        step += 1
+
+        if visualize_freq > 0 and step % visualize_freq == 0:
+            states.append(inner(state).copy())
+
+        # Check for no progress, meaning no solution
+        if fronts.update(step, len(pos_cells), len(neg_cells)):
+            break
+
+    return path_found, MovesState(state, moves, codes), step
+
+
+# -------------------------
+# Distance fields
+# -------------------------
+def distance_field(wall_mask: np.ndarray, source, padded: bool = False, moves: Moves = None) -> np.ndarray:
+    """
+    Compute the breadth-first distance from one cell to every cell of its region.
+
+    The field is grown like a single team of `propagate_frontier`, one layer per step.
+
+    Args:
+        wall_mask (np.ndarray): Wall mask from `initialize`, non-zero for empty cells, 2D or a volume
+        source: (row, col) map coordinates of the source cell, one coordinate per axis for volumes
+        padded (bool): If True, the wall mask is in the padded layout of `initialize(padded=True)`
+            and so is the returned field
+        moves (Moves): Moves built on the padded wall mask. Default: the face neighbors
+
+    Returns:
+        np.ndarray: 1 on the source, k + 1 on the cells k moves away, 0 on walls and unreachable cells
+
+    Raises:
+        ValueError: If the source is a wall
+    """
+    walls = (wall_mask if padded else np.pad(wall_mask, 1)) != 0
+    origin = tuple(int(v) + 1 for v in source)
+    if not walls[origin]:
+        raise ValueError(f"Distance field error: the source {tuple(source)} is a wall.")
+    if moves is None:
+        moves = Moves(walls)
+
+    field = np.zeros(walls.shape, dtype=distance_dtype(np.count_nonzero(walls)))
+    flat_field = field.reshape(-1)
+    flat_walls = walls.reshape(-1)
+
+    cells = np.array([np.ravel_multi_index(origin, field.shape)], dtype=np.intp)
+    flat_field[cells] = 1
+    distance = 1
+    while len(cells):
+        cells = expand_frontier(cells, flat_field, flat_walls, moves)
+        distance += 1
+        flat_field[cells] = distance
+
+    return field if padded else inner(field)
+
+
+# -------------------------
+# Boolean engine
+# -------------------------
+def propagate_boolean(labyrinth_map: np.ndarray, meetpoints: list, visualize_freq: int, states: list, workspace: Workspace = None, problem: tuple = None) -> tuple:
+    """
+    Same propagation as `propagate_distances_through_map` using boolean dilations.
+
+    Since the propagation is a breadth-first search, every cell reached during step k is at distance
+    k + 1 from its team's origin. Each team is then a boolean "reached" mask grown by OR-ing its
+    shifted views and AND-ing with the free cells, and the only integer write is the layer index of
+    the new cells. The signed state is rebuilt from the layers and the masks when it is needed.
+    """
+    wall_mask, layer, min_dist, origins = prepare(labyrinth_map) if problem is None else problem
+
+    if workspace is None:
+        workspace = Workspace()
+
+    # Contiguous views of the flat padded buffers: the border is a wall, so the neighbors across each move of
+    # ORTHOGONAL are the core slice moved by the flat offset of the move
+    width = layer.shape[1]
+    size = layer.size
+    core = slice(width + 1, size - width - 1)
+    offsets = stencil_offsets(layer.shape)
+    first, second = reporting_moves()  # the neighbors whose meetpoints are reported on the cell
+
+    flat_layer = layer.reshape(-1)
+    flat_walls = wall_mask.reshape(-1)
+    pos = workspace.get("bool_pos", (size,), bool)
+    neg = workspace.get("bool_neg", (size,), bool)
+    np.greater(flat_layer, 0, out=pos)
+    np.less(flat_layer, 0, out=neg)
+    np.abs(flat_layer, out=flat_layer)
+
+    def views(team: np.ndarray) -> list:
+        return [team[core.start + offset:core.stop + offset] for offset in offsets]
+
+    pos_inner, neg_inner = pos[core], neg[core]
+    pos_neighbors, neg_neighbors = views(pos), views(neg)
+    walls_inner = flat_walls[core]
+    layer_inner = flat_layer[core]
+
+    shape = pos_inner.shape
+    free = workspace.get("bool_free", shape, bool)
+    new_pos = workspace.get("bool_new_pos", shape, bool)
+    new_neg = workspace.get("bool_new_neg", shape, bool)
+    collision = workspace.get("bool_collision", shape, bool)
+
+    def signed_state() -> np.ndarray:
+        """Fill in the signed distances of the finish team, turning the layers into the usual state."""
+        state = layer.copy()
+        np.negative(state, out=state, where=neg.reshape(layer.shape))
+        return state
+
+    path_found = False
+    step = 1
+
+    if visualize_freq > 0:
+        states.append(signed_state()[1:-1, 1:-1])
+
+    fronts = Wavefronts(*map(len, origins))
+
+    while not path_found:
+        # Check for collision: a start cell next to a finish cell across a reporting move, or the opposite
+        if step >= min_dist:
+            np.logical_or(neg_neighbors[first], neg_neighbors[second], out=collision)
+            np.logical_and(collision, pos_inner, out=collision)
+            np.logical_or(pos_neighbors[first], pos_neighbors[second], out=free)
+            np.logical_and(free, neg_inner, out=free)
+            np.logical_or(collision, free, out=collision)
             if collision.any():
                 path_found = True
-                meetpoints.append(np.argwhere(collision)[0])
+                meetpoints.extend(unpad_cells(np.flatnonzero(collision) + core.start, width))
                 break
 
-        # Propagate distances
-        down = shift_down(state)
-        left = shift_left(state)
+        # Free cells: empty and not reached by any team
+        np.logical_or(pos_inner, neg_inner, out=free)
+        np.logical_not(free, out=free)
+        np.logical_and(free, walls_inner, out=free)
+
+        # Dilate the start team first, it wins contested cells like in the dense engine
+        for new, neighbors in ((new_pos, pos_neighbors), (new_neg, neg_neighbors)):
+            np.logical_or(neighbors[0], neighbors[1], out=new)
+            for neighbor in neighbors[2:]:
+                np.logical_or(new, neighbor, out=new)
+            np.logical_and(new, free, out=new)
+        np.logical_and(new_neg, np.logical_not(new_pos, out=free), out=new_neg)
 
-        neighbors = np.stack([up, down, left, right])
-        pos = np.where(neighbors > 0, neighbors, INT_MAX).min(axis=0)
-        neg = np.where(neighbors < 0, neighbors, INT_MIN).max(axis=0)
-        new_distances = np.where(pos != INT_MAX, pos + 1,
-                                 np.where(neg != INT_MIN, neg - 1, 0))
-                                 
-        new_distances *= np.where(state == 0, wall_mask, 0)  # Only update empty cells
+        np.logical_or(pos_inner, new_pos, out=pos_inner)
+        np.logical_or(neg_inner, new_neg, out=neg_inner)
 
-        state += new_distances
         step += 1
+        added_pos = np.count_nonzero(new_pos)
+        added_neg = np.count_nonzero(new_neg)
 
-        if step % visualize_freq == 0 and visualize_freq > 0:
-            states.append(state.copy())
+        # Record the layer of the new cells
+        if added_pos:
+            np.copyto(layer_inner, step, where=new_pos)
+        if added_neg:
+            np.copyto(layer_inner, step, where=new_neg)
 
-        max_pos = np.where(state > 0, state, INT_MIN).max()
-        min_neg = np.where(state < 0, state, INT_MAX).min()
+        if visualize_freq > 0 and step % visualize_freq == 0:
+            states.append(signed_state()[1:-1, 1:-1])
 
         # Check for no progress, meaning no solution
-        if abs(max_pos + min_neg) > 1 or (min_neg == prev_min_neg and max_pos == prev_max_pos):
+        if fronts.update(step, added_pos, added_neg):
             break
 
-        prev_max_pos = max_pos
-        prev_min_neg = min_neg
+    return path_found, signed_state(), step
+
+
+# -------------------------
+# Bit-packed engine
+# -------------------------
+WORD_BITS = 64
+
+def pack_rows(mask: np.ndarray) -> np.ndarray:
+    """
+    Pack a boolean matrix into rows of uint64 words, column c being bit c % 64 of word c // 64.
+
+    An empty row is added above and below the matrix so vertical neighbors are plain row offsets.
+    """
+    h, w = mask.shape
+    words = -(-w // WORD_BITS)
+    bits = np.zeros((h + 2, words * WORD_BITS), dtype=bool)
+    bits[1:-1, :w] = mask
+    return np.packbits(bits, axis=1, bitorder="little").view("<u8")
+
+def packed_cells(words: np.ndarray) -> np.ndarray:
+    """Return the (row, col) coordinates of the set bits of a packed matrix, in row-major order."""
+    rows, word = np.nonzero(words)
+    bits = np.unpackbits(words[rows, word].view(np.uint8).reshape(-1, 8), axis=1, bitorder="little")
+    index, bit = np.nonzero(bits)
+    return np.stack([rows[index], word[index] * WORD_BITS + bit], axis=1)
+
+def shift_packed_from_left(a: np.ndarray, out: np.ndarray) -> np.ndarray:
+    """Move every bit one column to the right, carrying between words: each cell gets the bit of its left neighbor."""
+    np.left_shift(a, 1, out=out)
+    out[:, 1:] |= a[:, :-1] >> 63
+    return out
+
+def shift_packed_from_right(a: np.ndarray, out: np.ndarray) -> np.ndarray:
+    """Move every bit one column to the left, carrying between words: each cell gets the bit of its right neighbor."""
+    np.right_shift(a, 1, out=out)
+    out[:, :-1] |= a[:, 1:] << 63
+    return out
+
+class PackedState:
+    """
+    Result of the bit-packed engine.
+
+    Besides the reached masks of both teams, it stores each cell's layer modulo 3 on two bit planes.
+    During the reconstruction, the layer of the current cell is known and the layers of its neighbors
+    can only take three consecutive values, which the modulo is enough to tell apart.
+    """
+
+    def __init__(self, pos: np.ndarray, neg: np.ndarray, low: np.ndarray, high: np.ndarray, step: int):
+        self.pos = pos
+        self.neg = neg
+        self.low = low
+        self.high = high
+        self.step = step
+
+    def bit(self, plane: np.ndarray, x: int, y: int) -> int:
+        """Read the bit of map cell (x, y) in a plane, 0 outside of the map."""
+        if not (0 <= x < plane.shape[0] - 2 and 0 <= y < plane.shape[1] * WORD_BITS):
+            return 0
+        return int(plane[x + 1, y // WORD_BITS] >> (y % WORD_BITS)) & 1
+
+    def value(self, x: int, y: int, highest: int) -> int:
+        """
+        Return the signed distance of map cell (x, y), 0 if unreached.
+
+        The layer is assumed to be one of highest - 2, highest - 1 and highest.
+        """
+        sign = 1 if self.bit(self.pos, x, y) else -1 if self.bit(self.neg, x, y) else 0
+        if sign == 0:
+            return 0
+        code = self.bit(self.low, x, y) | self.bit(self.high, x, y) << 1
+        return sign * (highest - (highest - code) % 3)
+
+    def reconstruct_path(self, meetpoint) -> np.ndarray:
+        """Same walk as `reconstruct_path`, with the distances decoded from the layer planes."""
+        x0, y0 = int(meetpoint[0]), int(meetpoint[1])
+
+        # The cells on both sides of a meetpoint were reached during the last two steps
+        value = self.value(x0, y0, self.step)
+        path = [(x0, y0)]
+
+        for sign in (1, -1):
+            x, y, current = x0, y0, value
+            half = []
+            while current != sign:
+                # Neighbors of the same team are one layer apart at most, the ones across the meetpoint
+                # were reached during the last two steps
+                highest = abs(current) + 1 if current * sign > 0 else self.step
+                best = None
+                for i, j in ((x + dx, y + dy) for dx, dy in ORTHOGONAL.offsets):
+                    val = self.value(i, j, highest) * sign
+                    if val > 0 and (best is None or val < best[2]):
+                        best = (i, j, val)
+
+                x, y, current = best[0], best[1], best[2] * sign
+                half.append((x, y))
+
+            if sign == 1:
+                path = half[::-1] + path
+            else:
+                path += half
+
+        return np.array(path, dtype=np.intp)
+
+def propagate_packed(labyrinth_map: np.ndarray, meetpoints: list, visualize_freq: int, states: list, workspace: Workspace = None) -> tuple:
+    """
+    Same propagation as `propagate_boolean` on rows of packed uint64 words, 64 cells per operation.
+
+    Vertical neighbors are row offsets and horizontal ones are word shifts with a carry between
+    words. The layer of each cell is kept modulo 3 on two more bit planes (see `PackedState`), so
+    the result holds 5 bits per cell (walls, both teams and the layer). The loop adds 5 workspace
+    planes of the same size, about 10 bits per cell during the search. Visualization states only
+    show which team reached a cell (+1 / -1) since absolute distances are not stored.
+    """
+    start, finish, min_dist = locate_endpoints(labyrinth_map, multiple=True)
+
+    if workspace is None:
+        workspace = Workspace()
+
+    walls = pack_rows(labyrinth_map != 0)
+    shape = walls.shape
+    inner_shape = (shape[0] - 2, shape[1])
+
+    pos = np.zeros(shape, dtype=walls.dtype)
+    neg = np.zeros(shape, dtype=walls.dtype)
+    low = np.zeros(shape, dtype=walls.dtype)
+    high = np.zeros(shape, dtype=walls.dtype)
+    for plane, cells in ((pos, start), (neg, finish), (low, start), (low, finish)):
+        for x, y in cells:
+            plane[x + 1, y // WORD_BITS] |= np.uint64(1 << (y % WORD_BITS))  # layer 1 is code 1
+
+    def views(plane: np.ndarray) -> tuple:
+        return plane[1:-1], plane[2:], plane[:-2]  # cells, neighbors below, neighbors above
+
+    pos_inner, pos_below, pos_above = views(pos)
+    neg_inner, neg_below, neg_above = views(neg)
+    walls_inner = walls[1:-1]
+    low_inner, high_inner = low[1:-1], high[1:-1]
+
+    free = workspace.get("packed_free", inner_shape, walls.dtype)
+    new_pos = workspace.get("packed_new_pos", inner_shape, walls.dtype)
+    new_neg = workspace.get("packed_new_neg", inner_shape, walls.dtype)
+    shifted = workspace.get("packed_shifted", inner_shape, walls.dtype)
+    collision = workspace.get("packed_collision", inner_shape, walls.dtype)
+
+    def dilate(inner: np.ndarray, below: np.ndarray, above: np.ndarray, out: np.ndarray) -> np.ndarray:
+        np.bitwise_or(below, above, out=out)
+        out |= shift_packed_from_left(inner, shifted)
+        out |= shift_packed_from_right(inner, shifted)
+        return out
+
+    def reach_map() -> np.ndarray:
+        unpack = lambda plane: np.unpackbits(plane[1:-1].view(np.uint8), axis=1, bitorder="little")[:, :labyrinth_map.shape[1]]
+        return unpack(pos).astype(np.int8) - unpack(neg).astype(np.int8)
+
+    path_found = False
+    step = 1
+
+    if visualize_freq > 0:
+        states.append(reach_map())
+
+    fronts = Wavefronts(len(start), len(finish))
+
+    while not path_found:
+        # Check for collision: a start cell whose up or right neighbor is a finish cell, or the opposite
+        if step >= min_dist:
+            np.bitwise_or(neg_below, shift_packed_from_left(neg_inner, shifted), out=collision)
+            collision &= pos_inner
+            np.bitwise_or(pos_below, shift_packed_from_left(pos_inner, shifted), out=free)
+            free &= neg_inner
+            collision |= free
+
+            if collision.any():
+                path_found = True
+                meetpoints.extend(packed_cells(collision))
+                break
+
+        # Free cells: empty and not reached by any team
+        np.bitwise_or(pos_inner, neg_inner, out=free)
+        np.bitwise_and(walls_inner, np.invert(free, out=free), out=free)
+
+        # Dilate the start team first, it wins contested cells like in the dense engine
+        dilate(pos_inner, pos_below, pos_above, new_pos)
+        new_pos &= free
+        dilate(neg_inner, neg_below, neg_above, new_neg)
+        new_neg &= free
+        new_neg &= np.invert(new_pos, out=free)
+
+        pos_inner |= new_pos
+        neg_inner |= new_neg
+
+        step += 1
+        added_pos = int(np.bitwise_count(new_pos).sum())
+        added_neg = int(np.bitwise_count(new_neg).sum())
+
+        # Record the layer of the new cells modulo 3
+        code = step % 3
+        for new in (new_pos, new_neg):
+            if code & 1:
+                low_inner |= new
+            if code & 2:
+                high_inner |= new
+
+        if visualize_freq > 0 and step % visualize_freq == 0:
+            states.append(reach_map())
+
+        # Check for no progress, meaning no solution
+        if fronts.update(step, added_pos, added_neg):
+            break
+
+    return path_found, PackedState(pos, neg, low, high, step), step
+
+
+# -------------------------
+# Tiled engine
+# -------------------------
+def grow_layer(views: tuple, step: int, buffers: list, width: int) -> tuple:
+    """
+    Grow both teams by one layer inside a window of the padded state.
+
+    A free cell joins a team if one of its neighbors is on the team's last layer (|value| == step).
+    Cells written during the same step by another window are on the next layer and are ignored, so
+    windows can be processed in any order, or at the same time.
+
+    Args:
+        views (tuple): Window of the padded state, as returned by `window_views`
+        step (int): Current step, the layer of the frontiers
+        buffers (list): Three boolean buffers at least as large as the window
+        width (int): Row length of the padded layout
+
+    Returns:
+        tuple: Flat padded indices of the cells added to the start team and to the finish team
+    """
+    inner, inner_walls, neighbors, origin = views
+    new, free, match = (buffer[:inner.size].reshape(inner.shape) for buffer in buffers)
+
+    np.equal(inner, 0, out=free)
+    np.logical_and(free, inner_walls, out=free)
+
+    added = []
+    for value in (step, -step):  # the start team goes first and wins contested cells
+        new.fill(False)
+        for neighbor in neighbors:
+            np.equal(neighbor, value, out=match)
+            np.logical_or(new, match, out=new)
+        np.logical_and(new, free, out=new)
+        np.copyto(inner, value + (1 if value > 0 else -1), where=new)
+        np.logical_and(free, np.logical_not(new, out=match), out=free)
+        added.append(window_cells(new, origin, width))
+
+    return tuple(added)
+
+def propagate_tiled(labyrinth_map: np.ndarray, meetpoints: list, visualize_freq: int, states: list, tile: int = 128, workspace: Workspace = None, problem: tuple = None) -> tuple:
+    """
+    Same propagation as `propagate_distances_through_map`, processed in square tiles small enough to
+    stay in cache.
+
+    Each tile reads its one-cell halo straight from the padded state. Only the tiles where a team
+    gained cells during the last step, and their neighbors, can change, and tiles without any free
+    cell left are saturated, so every other tile is skipped. A cell is reached from a neighbor of
+    the last layer (|value| == step), which keeps the result independent of the order in which the
+    tiles are processed.
+
+    Args:
+        tile (int): Side of the tiles in cells. Default 128
+    """
+    wall_mask, state, min_dist, origins = prepare(labyrinth_map) if problem is None else problem
+
+    if workspace is None:
+        workspace = Workspace()
+
+    height, width = state.shape
+    flat_state = state.reshape(-1)
+    moves = Moves(wall_mask)  # meetpoints are found across the four orthogonal moves
+    tiles_shape = (-(-(height - 2) // tile), -(-(width - 2) // tile))
+
+    # Free cells left in each tile, a tile at 0 is saturated
+    walls_inner = np.zeros((tiles_shape[0] * tile, tiles_shape[1] * tile), dtype=bool)
+    walls_inner[:height - 2, :width - 2] = wall_mask[1:-1, 1:-1]
+    free_cells = walls_inner.reshape(tiles_shape[0], tile, tiles_shape[1], tile).sum(axis=(1, 3))
+    del walls_inner
+
+    buffers = [workspace.get(f"tile_{name}", (tile * tile,), bool) for name in ("new", "free", "match")]
+
+    def tile_of(cells: np.ndarray) -> np.ndarray:
+        rows, cols = np.divmod(cells, width)
+        return (rows - 1) // tile * tiles_shape[1] + (cols - 1) // tile
+
+    path_found = False
+    step = 1
+
+    if visualize_freq > 0:
+        states.append(state[1:-1, 1:-1].copy())
+
+    fronts = Wavefronts(*map(len, origins))
+    recent = np.concatenate(origins)  # cells added during the last step, in the flat padded layout
+    np.subtract.at(free_cells.reshape(-1), tile_of(recent), 1)
+
+    while not path_found:
+        # Check for collision (start/finish fronts meet), only the cells added during the last step can create one
+        if step >= min_dist:
+            found = frontier_meetpoints(recent, flat_state, moves)
+            if len(found):
+                path_found = True
+                meetpoints.extend(unpad_cells(found, width))
+                break
+
+        # Active tiles: the ones holding the last cells added and their neighbors, unless saturated
+        active = np.zeros(tiles_shape, dtype=bool)
+        active.reshape(-1)[tile_of(recent)] = True
+        active[1:] |= active[:-1].copy()
+        active[:-1] |= active[1:].copy()
+        active[:, 1:] |= active[:, :-1].copy()
+        active[:, :-1] |= active[:, 1:].copy()
+        active &= free_cells > 0
+
+        added_pos, added_neg = [], []
+        for i, j in np.argwhere(active):
+            r0, c0 = 1 + i * tile, 1 + j * tile
+            r1, c1 = min(r0 + tile, height - 1), min(c0 + tile, width - 1)
+            # Tiles are always 2D views, a flat span would also cover cells of the next tiles
+            views = window_views(state, wall_mask, (r0, r1, c0, c1), allow_flat=False)
+            new_pos, new_neg = grow_layer(views, step, buffers, width)
+            free_cells[i, j] -= len(new_pos) + len(new_neg)
+            added_pos.append(new_pos)
+            added_neg.append(new_neg)
+
+        added_pos = np.concatenate(added_pos) if added_pos else np.zeros(0, dtype=np.intp)
+        added_neg = np.concatenate(added_neg) if added_neg else np.zeros(0, dtype=np.intp)
+        recent = np.concatenate([added_pos, added_neg])
+
+        step += 1
+
+        if visualize_freq > 0 and step % visualize_freq == 0:
+            states.append(state[1:-1, 1:-1].copy())
+
+        # Check for no progress, meaning no solution
+        if fronts.update(step, len(added_pos), len(added_neg)):
+            break
 
     return path_found, state, step
 
 
+# -------------------------
+# Striped engine
+# -------------------------
+def propagate_striped(labyrinth_map: np.ndarray, meetpoints: list, visualize_freq: int, states: list, stripes: int = None, threads: int = None, timings: list = None, workspace: Workspace = None, problem: tuple = None) -> tuple:
+    """
+    Same propagation as `propagate_tiled`, with the map cut into horizontal stripes grown in parallel
+    by a thread pool. NumPy releases the GIL inside its array loops, so the stripes run on several cores.
+
+    The stripes share the padded state and read their halo rows straight from their neighbors.
+    `grow_layer` only extends from the last layer, so a neighbor writing its next layer at the same
+    time can't change the result, and the halo exchange is the barrier at the end of each step.
+
+    Args:
+        stripes (int): Number of stripes. Default: the number of threads
+        threads (int): Number of worker threads. Default: the number of CPUs
+        timings (list): If given, receives the time spent growing each stripe (ns), to tune the stripe count
+    """
+    wall_mask, state, min_dist, origins = prepare(labyrinth_map) if problem is None else problem
+
+    if workspace is None:
+        workspace = Workspace()
+    if threads is None:
+        threads = os.cpu_count() or 1
+    if stripes is None:
+        stripes = threads
+
+    height, width = state.shape
+    flat_state = state.reshape(-1)
+    moves = Moves(wall_mask)  # meetpoints are found across the four orthogonal moves
+
+    # Row bounds of the stripes in padded coordinates, each stripe has its own buffers
+    bounds = np.linspace(1, height - 1, min(stripes, height - 2) + 1).astype(int)
+    stripes = len(bounds) - 1
+    views = [window_views(state, wall_mask, (bounds[k], bounds[k + 1], 1, width - 1)) for k in range(stripes)]
+    buffers = [[workspace.get(f"stripe{k}_{name}", (views[k][0].size,), bool) for name in ("new", "free", "match")] for k in range(stripes)]
+    totals = [0] * stripes
+
+    def stripe_of(cells: np.ndarray) -> np.ndarray:
+        return np.searchsorted(bounds, cells // width, side="right") - 1
+
+    def grow_stripe(k: int, step: int) -> tuple:
+        start_time = time.perf_counter_ns()
+        added = grow_layer(views[k], step, buffers[k], width)
+        return added, time.perf_counter_ns() - start_time
+
+    path_found = False
+    step = 1
+
+    if visualize_freq > 0:
+        states.append(state[1:-1, 1:-1].copy())
+
+    fronts = Wavefronts(*map(len, origins))
+    recent = np.concatenate(origins)  # cells added during the last step, in the flat padded layout
+
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        while not path_found:
+            # Check for collision (start/finish fronts meet), only the cells added during the last step can create one
+            if step >= min_dist:
+                found = frontier_meetpoints(recent, flat_state, moves)
+                if len(found):
+                    path_found = True
+                    meetpoints.extend(unpad_cells(found, width))
+                    break
+
+            # Active stripes: the ones holding the last cells added and their neighbors
+            active = np.zeros(stripes + 2, dtype=bool)
+            around = stripe_of(recent) + 1
+            active[around - 1] = active[around] = active[around + 1] = True
+            active = np.flatnonzero(active[1:-1])
+
+            added_pos, added_neg = [], []
+            for k, ((new_pos, new_neg), elapsed) in zip(active, pool.map(grow_stripe, active, [step] * len(active))):
+                totals[k] += elapsed
+                added_pos.append(new_pos)
+                added_neg.append(new_neg)
+
+            added_pos = np.concatenate(added_pos) if added_pos else np.zeros(0, dtype=np.intp)
+            added_neg = np.concatenate(added_neg) if added_neg else np.zeros(0, dtype=np.intp)
+            recent = np.concatenate([added_pos, added_neg])
+
+            step += 1
+
+            if visualize_freq > 0 and step % visualize_freq == 0:
+                states.append(state[1:-1, 1:-1].copy())
+
+            # Check for no progress, meaning no solution
+            if fronts.update(step, len(added_pos), len(added_neg)):
+                break
+
+    if timings is not None:
+        timings.extend(totals)
+
+    return path_found, state, step
+
+
+# -------------------------
+# Team-parallel engine
+# -------------------------
+def propagate_teams(labyrinth_map: np.ndarray, meetpoints: list, visualize_freq: int, states: list, workspace: Workspace = None, problem: tuple = None) -> tuple:
+    """
+    Same propagation as `propagate_boolean` with each team in its own arrays, the two teams being
+    expanded at the same time on two threads.
+
+    During a step, both teams only read the free cells computed at the end of the previous step and
+    write to their own arrays. The threads meet once per step: cells claimed by both teams go to the
+    start team, as in the dense engine, then the collision check runs.
+    """
+    wall_mask, state, min_dist, origins = prepare(labyrinth_map) if problem is None else problem
+
+    if workspace is None:
+        workspace = Workspace()
+
+    # Contiguous views of the flat padded buffers: the border is a wall, so the neighbors across each move of
+    # ORTHOGONAL are the core slice moved by the flat offset of the move
+    width = state.shape[1]
+    size = state.size
+    core = slice(width + 1, size - width - 1)
+    offsets = stencil_offsets(state.shape)
+    first, second = reporting_moves()  # the neighbors whose meetpoints are reported on the cell
+    shape = (core.stop - core.start,)
+
+    class Team:
+        def __init__(self, name: str, origin: np.ndarray):
+            self.reached = workspace.get(f"team_{name}_reached", (size,), bool)
+            np.copyto(self.reached, origin)
+            self.distance = np.zeros(size, dtype=state.dtype)  # part of the result, not a workspace buffer
+            self.distance[origin] = 1
+            self.inner = self.reached[core]
+            self.neighbors = [self.reached[core.start + offset:core.stop + offset] for offset in offsets]
+            self.distance_inner = self.distance[core]
+            self.new = workspace.get(f"team_{name}_new", shape, bool)
+
+        def expand(self, step: int):
+            """Add the free cells next to the team, they are at distance step + 1."""
+            np.logical_or(self.neighbors[0], self.neighbors[1], out=self.new)
+            for neighbor in self.neighbors[2:]:
+                np.logical_or(self.new, neighbor, out=self.new)
+            np.logical_and(self.new, free, out=self.new)
+            np.logical_or(self.inner, self.new, out=self.inner)
+            np.copyto(self.distance_inner, step + 1, where=self.new)
+
+    flat_state = state.reshape(-1)
+    pos = Team("pos", flat_state > 0)
+    neg = Team("neg", flat_state < 0)
+
+    free = workspace.get("team_free", shape, bool)
+    contested = workspace.get("team_contested", shape, bool)
+    collision = workspace.get("team_collision", shape, bool)
+    np.logical_and(wall_mask.reshape(-1)[core], flat_state[core] == 0, out=free)
+
+    def signed_state() -> np.ndarray:
+        return (pos.distance - neg.distance).reshape(state.shape)
+
+    path_found = False
+    step = 1
+
+    if visualize_freq > 0:
+        states.append(signed_state()[1:-1, 1:-1])
+
+    fronts = Wavefronts(*map(len, origins))
+
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        while not path_found:
+            # Check for collision: a start cell next to a finish cell across a reporting move, or the opposite
+            if step >= min_dist:
+                np.logical_or(neg.neighbors[first], neg.neighbors[second], out=collision)
+                np.logical_and(collision, pos.inner, out=collision)
+                np.logical_or(pos.neighbors[first], pos.neighbors[second], out=contested)
+                np.logical_and(contested, neg.inner, out=contested)
+                np.logical_or(collision, contested, out=collision)
+                if collision.any():
+                    path_found = True
+                    meetpoints.extend(unpad_cells(np.flatnonzero(collision) + core.start, width))
+                    break
+
+            # The finish team runs on the pool while the start team runs on this thread
+            finish_done = pool.submit(neg.expand, step)
+            pos.expand(step)
+            finish_done.result()
+
+            # Cells claimed by both teams go to the start team
+            np.logical_and(pos.new, neg.new, out=contested)
+            if contested.any():
+                np.copyto(neg.distance_inner, 0, where=contested)
+                np.logical_not(contested, out=contested)
+                np.logical_and(neg.new, contested, out=neg.new)
+                np.logical_and(neg.inner, contested, out=neg.inner)
+
+            np.logical_and(free, np.logical_not(pos.new, out=contested), out=free)
+            np.logical_and(free, np.logical_not(neg.new, out=contested), out=free)
+
+            step += 1
+
+            if visualize_freq > 0 and step % visualize_freq == 0:
+                states.append(signed_state()[1:-1, 1:-1])
+
+            # Check for no progress, meaning no solution
+            if fronts.update(step, np.count_nonzero(pos.new), np.count_nonzero(neg.new)):
+                break
+
+    return path_found, signed_state(), step
+
+
+# -------------------------
+# Weighted engine
+# -------------------------
+class WeightedState:
+    """
+    Result of the weighted engine.
+
+    `forward` is the cost of reaching each cell from the closest start and `backward` the cost of
+    reaching the closest finish from each cell, both padded and counted like the signed state
+    (1 on the endpoints). Unreached cells hold `unreached`. A cell can be reached by both teams.
+    """
+
+    def __init__(self, forward: np.ndarray, backward: np.ndarray, costs: np.ndarray, unreached: int):
+        self.forward = forward
+        self.backward = backward
+        self.costs = costs
+        self.unreached = unreached
+
+    def signed(self) -> np.ndarray:
+        """Signed state like the other engines, each cell going to the team that reached it cheaper (the start team on ties)."""
+        forward = np.where(self.forward != self.unreached, self.forward, 0)
+        backward = np.where(self.backward != self.unreached, -self.backward, 0)
+        return np.where((forward != 0) & ((backward == 0) | (forward <= -backward)), forward, backward)
+
+    def reconstruct_path(self, meetpoint) -> np.ndarray:
+        """
+        Walk from a meetpoint down to the start and to the finish.
+
+        Going back toward the start, the previous cell is the neighbor whose forward cost plus the
+        cost of entering the current cell gives the current forward cost. Toward the finish, it is
+        the neighbor whose backward cost plus its own entering cost gives the current backward cost.
+
+        Returns:
+            np.ndarray: (length, 2) map coordinates of the cells, from start to finish
+        """
+        forward, backward, costs = self.forward, self.backward, self.costs
+
+        x, y = int(meetpoint[0]) + 1, int(meetpoint[1]) + 1
+        path = [(x - 1, y - 1)]
+        while forward[x, y] != 1:
+            previous = int(forward[x, y]) - int(costs[x, y])
+            for i, j in ((x + dx, y + dy) for dx, dy in ORTHOGONAL.offsets):
+                if forward[i, j] == previous:
+                    x, y = i, j
+                    break
+            path.append((x - 1, y - 1))
+        path.reverse()
+
+        x, y = int(meetpoint[0]) + 1, int(meetpoint[1]) + 1
+        while backward[x, y] != 1:
+            current = int(backward[x, y])
+            for i, j in ((x + dx, y + dy) for dx, dy in ORTHOGONAL.offsets):
+                if backward[i, j] != self.unreached and int(backward[i, j]) + int(costs[i, j]) == current:
+                    x, y = i, j
+                    break
+            path.append((x - 1, y - 1))
+
+        return np.array(path, dtype=np.intp)
+
+def propagate_weighted(labyrinth_map: np.ndarray, meetpoints: list, visualize_freq: int, states: list, costs: np.ndarray = None) -> tuple:
+    """
+    Bidirectional Dijkstra over integer cell costs, with bucket queues (Dial's algorithm): each
+    team settles all its cells of cost level t at once, with the same vectorized neighbor
+    gathering as `propagate_frontier`.
+
+    Entering a cell costs its value in `costs`. At each level the start team settles its cells,
+    then the finish team does, and the search stops once no path through unsettled cells can be
+    cheaper than the cheapest cell reached by both teams. The meetpoints are all the cells of the
+    cheapest paths. With unit costs, the levels are the steps of the other engines.
+
+    Args:
+        costs (np.ndarray): Integer cost (at least 1) of entering each cell, shaped like the map.
+            Default: 1 everywhere
+    """
+    wall_mask, _, _, origins = prepare(labyrinth_map)
+    empty = labyrinth_map != 0
+
+    if costs is None:
+        costs = np.ones(labyrinth_map.shape, dtype=np.int64)
+    costs = np.asarray(costs)
+    if costs.shape != labyrinth_map.shape or not np.issubdtype(costs.dtype, np.integer):
+        raise ValueError("Weighted engine error: costs should be an integer matrix shaped like the map.")
+    if (costs[empty] < 1).any():
+        raise ValueError("Weighted engine error: the cost of every empty cell should be at least 1.")
+
+    # Costs can add up to the number of cells times the largest cost, the largest value of the dtype means unreached
+    max_cost = int(costs[empty].max())
+    dtype = distance_dtype(np.count_nonzero(empty) * max_cost)
+    unreached = np.iinfo(dtype).max
+
+    width = wall_mask.shape[1]
+    flat_walls = wall_mask.reshape(-1)
+    padded_costs = np.pad(costs, 1).astype(dtype)
+    flat_costs = padded_costs.reshape(-1)
+    offsets = np.array(stencil_offsets(wall_mask.shape))
+
+    class Team:
+        def __init__(self, origin: np.ndarray, forward: bool):
+            self.value = np.full(wall_mask.size, unreached, dtype=dtype)
+            self.value[origin] = 1
+            self.settled = np.zeros(wall_mask.size, dtype=bool)
+            self.forward = forward
+            # Circular bucket queue, slot t % (max_cost + 1) holds the cells that may be at cost t
+            self.buckets = [[] for _ in range(max_cost + 1)]
+            self.buckets[1 % len(self.buckets)].append(origin)
+
+        def settle(self, level: int) -> np.ndarray:
+            """Settle the cells at cost `level` and relax their neighbors. Returns the cells whose cost went down."""
+            slot = self.buckets[level % len(self.buckets)]
+            if not slot:
+                return np.zeros(0, dtype=np.intp)
+            cells = np.unique(np.concatenate(slot))
+            slot.clear()
+            cells = cells[(self.value[cells] == level) & ~self.settled[cells]]  # stale entries were lowered since
+            self.settled[cells] = True
+
+            # The padded border is a wall, so no bound checks are needed. Going forward, entering a neighbor
+            # costs its own cost, going backward the path enters the settled cell from the neighbor
+            neighbors = (cells[:, None] + offsets).reshape(-1)
+            entering = flat_costs[neighbors] if self.forward else np.repeat(flat_costs[cells], len(offsets))
+            cost = level + entering
+            keep = flat_walls[neighbors] & ~self.settled[neighbors] & (cost < self.value[neighbors])
+            neighbors, cost = neighbors[keep], cost[keep]
+
+            np.minimum.at(self.value, neighbors, cost)  # a cell can be the neighbor of several settled cells
+            lowered = self.value[neighbors] == cost
+            neighbors, cost = neighbors[lowered], cost[lowered]
+
+            order = np.argsort(cost, kind="stable")
+            levels, first = np.unique(cost[order], return_index=True)
+            for value, group in zip(levels, np.split(neighbors[order], first[1:])):
+                self.buckets[int(value) % len(self.buckets)].append(group)
+            return neighbors
+
+    pos = Team(origins[0], forward=True)
+    neg = Team(origins[1], forward=False)
+    weighted = WeightedState(pos.value.reshape(wall_mask.shape), neg.value.reshape(wall_mask.shape), padded_costs, unreached)
+
+    best = INT_MAX  # sum of both costs of the cheapest cell reached by both teams
+    level = 1
+    met = False
+    exhausted = False  # a team had nothing left to settle at the previous level
+
+    if visualize_freq > 0:
+        states.append(weighted.signed()[1:-1, 1:-1])
+
+    # Once the start team settled level t, a path through cells reached by a single team has a cost
+    # sum of at least 2 * t + 2, 2 * t + 3 once the finish team settled it too, and can't beat the best
+    # one anymore. With unit costs, the search stops at the step where the other engines meet
+    while not met:
+        # A team with nothing left to settle explored its whole region: the search gives up one level
+        # later, or right away if both are done, which is the dead-end test of `Wavefronts` with unit costs.
+        # Like `Wavefronts`, whose first step can't stall, two teams idle from level 2 stop at level 3
+        idle = [not any(team.buckets) for team in (pos, neg)]
+        if exhausted or (all(idle) and level > 2):
+            break
+        exhausted = any(idle)
+
+        for team, other, bound in ((pos, neg, 2 * level + 2), (neg, pos, 2 * level + 3)):
+            lowered = team.settle(level)
+            both = lowered[other.value[lowered] != unreached]
+            if len(both):
+                best = min(best, int((team.value[both].astype(np.int64) + other.value[both]).min()))
+            met = best <= bound
+            if met:
+                break
+
+        if met and team is pos:
+            break
+        level += 1  # both teams settled the level
+
+        if not met and visualize_freq > 0 and level % visualize_freq == 0:
+            states.append(weighted.signed()[1:-1, 1:-1])
+
+    path_found = best != INT_MAX
+    if path_found:
+        reached = (pos.value != unreached) & (neg.value != unreached)
+        total = np.where(reached, pos.value.astype(np.int64) + neg.value, INT_MAX)
+        meetpoints.extend(unpad_cells(np.flatnonzero(total == best), width))
+
+    return path_found, weighted, level
+
+
+ENGINES = {
+    "dense": propagate_distances_through_map,
+    "frontier": propagate_frontier,
+    "boolean": propagate_boolean,
+    "packed": propagate_packed,
+    "tiled": propagate_tiled,
+    "striped": propagate_striped,
+    "teams": propagate_teams,
+    "weighted": propagate_weighted,
+}
+
+VOLUME_ENGINES = ("frontier",)  # engines solving maps of any dimension, the others are 2D only
+STENCIL_ENGINES = ("frontier",)  # engines taking the move options, the others only move to the face neighbors
+MOVE_OPTIONS = ("diagonal", "corners", "stencil")
+
+
+# -------------------------
+# Multi-query labyrinth
+# -------------------------
+class Labyrinth:
+    """
+    A map prepared once to answer many shortest path queries between pairs of cells.
+
+    The padded wall mask, the component labels and the workspace are built when the object is
+    created. A query only resets the box of the padded state the previous propagation could reach
+    and writes its two endpoints at known flat indices, so it never scans the map for the start and
+    the finish, and a pair in two different regions is rejected from the labels without propagating.
+
+    Cells used as an endpoint by several queries get their `distance_field` computed and kept in a
+    least recently used cache. A query with a cached endpoint is answered by walking down the
+    field from the other endpoint, without any propagation.
+
+    Args:
+        labyrinth_map (np.ndarray): 2D map, 0 for walls. Start (2) and finish (3) cells are
+            allowed but ignored, the endpoints are given to each query. Volumes need an engine of
+            VOLUME_ENGINES, and the cells of their queries have one coordinate per axis
+        engine (str): Propagation engine, any key of ENGINES accepting a `problem` (all but "packed"
+            and "weighted"). Default "frontier"
+        field_budget (int): Memory allowed to the cached distance fields, in bytes, 0 to disable
+            the cache. Default 64 MiB
+        field_after (int): Number of queries using a cell as an endpoint before its field is
+            computed. Default 2
+        **engine_options: Extra keyword arguments given to the engine, the move options (`diagonal`,
+            `corners`, `stencil`) only with an engine of STENCIL_ENGINES
+    """
+
+    def __init__(self, labyrinth_map: np.ndarray, engine: str = "frontier", field_budget: int = 64 << 20, field_after: int = 2, **engine_options):
+        supported = [name for name, function in ENGINES.items() if "problem" in inspect.signature(function).parameters]
+        if labyrinth_map.ndim != 2:
+            supported = [name for name in supported if name in VOLUME_ENGINES]
+        if engine not in supported:
+            raise ValueError(f"Unsupported engine '{engine}', expected one of: {', '.join(supported)}")
+        check_move_options(engine, engine_options)
+
+        self.shape = labyrinth_map.shape
+        self.engine = ENGINES[engine]
+        self.engine_options = engine_options
+        if "workspace" in inspect.signature(self.engine).parameters:
+            self.engine_options.setdefault("workspace", Workspace())
+
+        empty = labyrinth_map != 0
+        stencil, corners = moves_options(engine_options, empty.ndim)
+        self.labels = label_components(empty, corners=corners, stencil=stencil)
+        self.wall_mask = np.pad(empty, 1)
+        self.moves = Moves(self.wall_mask, stencil, corners)
+        if "moves" in inspect.signature(self.engine).parameters:
+            self.engine_options.setdefault("moves", self.moves)  # compiled once for all the queries
+        self.state = np.zeros(self.wall_mask.shape, dtype=distance_dtype(np.count_nonzero(empty)))
+        self.written = None  # slices of the state the last propagation may have written, reset by the next one
+
+        # Largest change of a coordinate in one move, a propagation of s steps stays within s times that
+        # of its endpoints. Moves around a torus can reach any cell
+        self.spread = None if self.moves.stencil.wrap else max(max(map(abs, move)) for move in self.moves.directions)
+
+        self.field_budget = field_budget
+        self.field_after = field_after
+        self.fields = OrderedDict()  # (row, col) -> padded read-only distance field
+        self.field_bytes = 0
+        self.uses = {}  # (row, col) -> number of queries using the cell as an endpoint
+
+    def is_empty(self, cell) -> bool:
+        """Return True if a (row, col) cell is inside the map and not a wall."""
+        return len(cell) == len(self.shape) and all(0 <= v < n for v, n in zip(cell, self.shape)) and self.labels[cell] >= 0
+
+    def flat_index(self, cell: tuple) -> int:
+        """Return the flat index of a map cell in the padded layout."""
+        return int(np.ravel_multi_index(tuple(v + 1 for v in cell), self.state.shape))
+
+    def distance_field(self, cell) -> np.ndarray:
+        """Return the (read-only) `distance_field` of an empty cell, from the cache or computed and cached."""
+        cell = tuple(int(v) for v in cell)
+        field = self.fields.get(cell)
+        if field is not None:
+            self.fields.move_to_end(cell)
+            return inner(field)
+
+        field = distance_field(self.wall_mask, cell, padded=True, moves=self.moves)
+        field.flags.writeable = False
+        if field.nbytes <= self.field_budget:
+            self.fields[cell] = field
+            self.field_bytes += field.nbytes
+            while self.field_bytes > self.field_budget:
+                self.field_bytes -= self.fields.popitem(last=False)[1].nbytes
+        return inner(field)
+
+    def cached_field(self, start: tuple, finish: tuple) -> tuple:
+        """
+        Find a usable distance field for a query, computing the field of an endpoint once it has
+        been used `field_after` times.
+
+        Returns:
+            tuple: (padded field, True if its source is the finish) or (None, None)
+        """
+        for cell, to_finish in ((finish, True), (start, False)):
+            if cell in self.fields:
+                self.fields.move_to_end(cell)
+                return self.fields[cell], to_finish
+
+        # A field has the padded shape and dtype of the state, one that can't be cached isn't worth computing
+        if self.state.nbytes > self.field_budget:
+            return None, None
+
+        if len(self.uses) > 4096:  # forget old counts rather than grow without bound
+            self.uses.clear()
+        for cell, to_finish in ((finish, True), (start, False)):
+            self.uses[cell] = self.uses.get(cell, 0) + 1
+            if self.uses[cell] >= self.field_after:
+                del self.uses[cell]
+                self.distance_field(cell)
+                if cell in self.fields:
+                    return self.fields[cell], to_finish
+
+        return None, None
+
+    def descend(self, field: np.ndarray, cell: tuple) -> list:
+        """Walk down a padded distance field from a cell to its source. Returns the flat padded indices of the cells."""
+        flat_field = field.reshape(-1)
+        current = self.flat_index(cell)
+        cells = [current]
+        while flat_field[current] != 1:
+            below = flat_field[current] - 1
+            for k in range(len(self.moves.directions)):
+                neighbor = self.moves.move(k, current)
+                allowed = self.moves.allowed(k, current)
+                if flat_field[neighbor] == below and (allowed is None or allowed):
+                    current = int(neighbor)
+                    break
+            cells.append(current)
+        return cells
+
+    def written_box(self, start: tuple, finish: tuple, steps: int) -> tuple:
+        """Return the slices of the padded state a propagation of `steps` steps between two cells may have written."""
+        if self.spread is None:
+            return (slice(None),) * len(self.shape)
+        margin = steps * self.spread
+        return tuple(slice(max(min(a, b) + 1 - margin, 1), min(max(a, b) + 2 + margin, n + 1)) for a, b, n in zip(start, finish, self.shape))
+
+    def shortest_path(self, start, finish) -> tuple:
+        """
+        Find the shortest path between two empty cells.
+
+        Args:
+            start: (row, col) of the start cell
+            finish: (row, col) of the finish cell
+
+        Returns:
+            tuple:
+                - path: (length, 2) map coordinates of the cells, empty if there is none, see `reconstruct_path`
+                - steps (int), 0 when the path comes from a cached distance field
+
+        Raises:
+            ValueError: If an endpoint is a wall or outside the map, or both are the same cell
+        """
+        start, finish = tuple(int(v) for v in start), tuple(int(v) for v in finish)
+        if not (self.is_empty(start) and self.is_empty(finish)) or start == finish:
+            raise ValueError(f"Invalid query: {start} and {finish} should be two different empty cells.")
+
+        if self.labels[start] != self.labels[finish]:
+            return empty_path(len(self.shape)), 0
+
+        field, to_finish = self.cached_field(start, finish)
+        if field is not None:
+            cells = self.descend(field, start if to_finish else finish)
+            if not to_finish:
+                cells.reverse()
+            return unpad_cells(np.array(cells), self.state.shape), 0
+
+        origins = tuple(np.array([self.flat_index(cell)], dtype=np.intp) for cell in (start, finish))
+        if self.written is not None:
+            self.state[self.written] = 0
+        self.written = (slice(None),) * len(self.shape)  # until the engine returns
+        self.state.reshape(-1)[origins[0]] = 1
+        self.state.reshape(-1)[origins[1]] = -1
+        min_dist = (sum(abs(a - b) for a, b in zip(start, finish)) - 1) / 2
+
+        meetpoints = []
+        problem = (self.wall_mask, self.state, min_dist, origins)
+        path_found, state, steps = self.engine(None, meetpoints, -1, None, problem=problem, **self.engine_options)
+        self.written = self.written_box(start, finish, steps)
+
+        if not path_found:
+            return empty_path(len(self.shape)), steps
+        meetpoint = shortest_meetpoint(state, meetpoints)
+        return (state.reconstruct_path(meetpoint) if isinstance(state, MovesState) else reconstruct_path(state, meetpoint)), steps
+
+    def shortest_paths(self, pairs) -> list:
+        """Answer several queries, see `shortest_path`. Returns one (path, steps) tuple per (start, finish) pair."""
+        return [self.shortest_path(start, finish) for start, finish in pairs]
+
+
+# -------------------------
+# Batched solver
+# -------------------------
+def find_shortest_path_batch(maps: np.ndarray) -> tuple:
+    """
+    Find the shortest paths of many labyrinths of the same shape at once.
+
+    The maps are stacked into a single 3D state and propagated together, so each step costs a
+    few array operations for the whole batch instead of a Python loop iteration per map. Every
+    map keeps its own "done" flag: once its fronts met or reached a dead end it stops updating.
+    Each result is the one `find_shortest_path` returns for the map alone.
+
+    Args:
+        maps (np.ndarray): (N, H, W) stack of labyrinth maps, each with one or several start and finish cells
+
+    Returns:
+        tuple:
+            - paths (list): path of each map ((length, 2) array, empty if there is no path)
+            - propagation_time (ns)
+            - reconstruction_time (ns)
+            - steps (np.ndarray): steps taken by each map
+    """
+    start_time = time.time_ns()
+
+    maps = np.asarray(maps)
+    count, h, w = maps.shape
+
+    endpoints = [locate_endpoints(lab_map, multiple=True) for lab_map in maps]
+    min_dist = np.array([dist for _, _, dist in endpoints])
+
+    # Padded maps flattened one per row, as in propagate_distances_through_map
+    width = w + 2
+    size = (h + 2) * width
+    walls = np.pad(maps != 0, ((0, 0), (1, 1), (1, 1))).reshape(count, size)
+    state = np.zeros((count, size), dtype=distance_dtype(int(np.count_nonzero(walls, axis=1).max(initial=0))))
+    for i, (start, finish, _) in enumerate(endpoints):
+        state[i, (start[:, 0] + 1) * width + start[:, 1] + 1] = 1
+        state[i, (finish[:, 0] + 1) * width + finish[:, 1] + 1] = -1
+
+    core = slice(width + 1, size - width - 1)
+    offsets = stencil_offsets((h + 2, width))
+    first, second = reporting_moves()  # the neighbors whose meetpoints are reported on the cell
+    buffers = [np.empty((count, core.stop - core.start), dtype=bool) for _ in range(4)]  # new, free, match, collision
+
+    def views(work: np.ndarray, work_walls: np.ndarray) -> tuple:
+        """Return the cells, walls and neighbors of the working rows, and the first rows of the buffers."""
+        neighbors = [work[:, core.start + offset:core.stop + offset] for offset in offsets]
+        return work[:, core], work_walls[:, core], neighbors, [buffer[:len(work)] for buffer in buffers]
+
+    # Dead-end test of Wavefronts, one entry per map
+    max_pos = np.ones(count, dtype=np.int64)
+    min_neg = -np.ones(count, dtype=np.int64)
+    prev_max_pos = np.zeros(count, dtype=np.int64)
+    prev_min_neg = np.zeros(count, dtype=np.int64)
+
+    active = np.ones(count, dtype=bool)
+    path_found = np.zeros(count, dtype=bool)
+    steps = np.zeros(count, dtype=np.int64)
+    meetpoints = [None] * count
+    step = 1
+
+    # Working set: the rows of the maps still running, `rows` gives the map of each of them. Once
+    # less than half of them are active, the others are written back and the working set shrinks,
+    # so a step costs O(active maps) rather than O(N) when a few maps take much longer than the rest
+    rows = np.arange(count)
+    work, work_walls = state, walls
+    inner, inner_walls, neighbors, (new, free, match, collision) = views(work, work_walls)
+
+    while active.any():
+        if np.count_nonzero(active) <= len(rows) // 2:
+            state[rows] = work
+            keep = np.flatnonzero(active)
+            rows, work, work_walls = rows[keep], state[rows[keep]], work_walls[keep]
+            active, min_dist = active[keep], min_dist[keep]
+            max_pos, min_neg, prev_max_pos, prev_min_neg = max_pos[keep], min_neg[keep], prev_max_pos[keep], prev_min_neg[keep]
+            inner, inner_walls, neighbors, (new, free, match, collision) = views(work, work_walls)
+        first_neighbor, second_neighbor = neighbors[first], neighbors[second]
+
+        # Check for collision (start/finish fronts meet) in the maps where one is possible
+        check = active & (step >= min_dist)
+        if check.any():
+            np.less(first_neighbor, 0, out=collision)
+            np.logical_or(collision, np.less(second_neighbor, 0, out=match), out=collision)
+            np.logical_and(collision, np.greater(inner, 0, out=match), out=collision)
+            np.greater(first_neighbor, 0, out=new)
+            np.logical_or(new, np.greater(second_neighbor, 0, out=match), out=new)
+            np.logical_and(new, np.less(inner, 0, out=match), out=new)
+            np.logical_or(collision, new, out=collision)
+
+            met = check & collision.any(axis=1)
+            for i in np.flatnonzero(met):
+                meetpoints[rows[i]] = unpad_cells(np.flatnonzero(collision[i]) + core.start, width)
+            path_found[rows[met]] = True
+            steps[rows[met]] = step
+            active &= ~met
+
+        # Propagate distances in the maps still running, the start team first so it wins contested cells
+        np.equal(inner, 0, out=free)
+        np.logical_and(free, inner_walls, out=free)
+        np.logical_and(free, active[:, None], out=free)
+
+        added = []
+        for value in (step, -step):
+            new.fill(False)
+            for neighbor in neighbors:
+                np.equal(neighbor, value, out=match)
+                np.logical_or(new, match, out=new)
+            np.logical_and(new, free, out=new)
+            np.copyto(inner, value + (1 if value > 0 else -1), where=new)
+            np.logical_and(free, np.logical_not(new, out=match), out=free)
+            added.append(np.count_nonzero(new, axis=1))
+
+        step += 1
+
+        # Check for no progress, meaning no solution
+        max_pos[added[0] > 0] = step
+        min_neg[added[1] > 0] = -step
+        stalled = active & ((np.abs(max_pos + min_neg) > 1) | ((min_neg == prev_min_neg) & (max_pos == prev_max_pos)))
+        steps[rows[stalled]] = step
+        active &= ~stalled
+        prev_max_pos[:] = max_pos
+        prev_min_neg[:] = min_neg
+
+    if work is not state:
+        state[rows] = work
+
+    elapsed1 = time.time_ns() - start_time
+    start_time = time.time_ns()
+
+    state = state.reshape(count, h + 2, width)
+    paths = [reconstruct_path(state[i], shortest_meetpoint(state[i], meetpoints[i])) if path_found[i] else empty_path() for i in range(count)]
+
+    elapsed2 = time.time_ns() - start_time
+    return paths, elapsed1, elapsed2, steps
+
+
+# -------------------------
+# Shape bucketing
+# -------------------------
+def bucket_shape(shape: tuple, growth: float = 1.25, smallest: int = 8) -> tuple:
+    """
+    Round a map shape up to the bucket ladder: smallest, then each edge about `growth` times the previous.
+
+    Maps in the same bucket are padded with walls up to the bucket shape, which wastes at most
+    about (growth**ndim - 1) of the cells. Maps of different dimensions never share a bucket.
+    """
+    def round_up(n: int) -> int:
+        edge = smallest
+        while edge < n:
+            edge = max(edge + 1, int(np.ceil(edge * growth)))
+        return edge
+
+    return tuple(round_up(n) for n in shape)
+
+def solve_bucketed(labyrinths: list, engine: str = "frontier", growth: float = 1.25, batch_cells: int = 4096, max_batch_cells: int = 1 << 22, **engine_options) -> tuple:
+    """
+    Solve labyrinths of mixed sizes, grouping similar shapes into batches.
+
+    The labyrinths are sorted into buckets of similar shapes (see `bucket_shape`). Small maps pay
+    mostly Python overhead per step, so buckets of 2D maps up to `batch_cells` cells are padded with
+    walls to the bucket shape and solved by `find_shortest_path_batch`. Larger maps and volumes are
+    solved one by one with `find_shortest_path` and the given engine. Padding with walls on the bottom and right
+    keeps coordinates, paths and step counts unchanged.
+
+    Args:
+        labyrinths (list): Labyrinth maps of any shapes, volumes included
+        engine (str): Engine for the maps solved one by one. Default "frontier"
+        growth (float): Ratio between consecutive bucket edges. Default 1.25
+        batch_cells (int): Largest bucket (in cells) solved in batches. Default 4096 (64x64)
+        max_batch_cells (int): Number of cells above which a batch is split. Default 4M
+        **engine_options: Extra keyword arguments given to the engine
+
+    Returns:
+        tuple:
+            - paths (list): path of each labyrinth, in input order (empty if there is no path)
+            - steps (np.ndarray): steps taken by each labyrinth
+            - metrics (dict): number of buckets, of batched and single solves, cells of the batched maps
+              before and after padding, and the fraction of padded cells wasted
+    """
+    buckets = {}
+    for index, lab_map in enumerate(labyrinths):
+        buckets.setdefault(bucket_shape(lab_map.shape, growth), []).append(index)
+
+    paths = [None] * len(labyrinths)
+    steps = np.zeros(len(labyrinths), dtype=np.int64)
+    metrics = {"buckets": len(buckets), "batched": 0, "single": 0, "cells": 0, "padded_cells": 0}
+
+    for shape, indices in sorted(buckets.items()):
+        cells = int(np.prod(shape))
+        if len(indices) > 1 and len(shape) == 2 and cells <= batch_cells:
+            per_batch = max(1, max_batch_cells // cells)
+            for first in range(0, len(indices), per_batch):
+                chunk = indices[first:first + per_batch]
+
+                stack = np.zeros((len(chunk), *shape), dtype=np.int8)  # 0 is a wall
+                for k, i in enumerate(chunk):
+                    stack[k][tuple(map(slice, labyrinths[i].shape))] = labyrinths[i]
+                    metrics["cells"] += labyrinths[i].size
+                metrics["padded_cells"] += stack.size
+
+                batch_paths, _, _, batch_steps = find_shortest_path_batch(stack)
+                for k, i in enumerate(chunk):
+                    paths[i] = batch_paths[k]
+                    steps[i] = batch_steps[k]
+
+            metrics["batched"] += len(indices)
+        else:
+            for i in indices:
+                paths[i], _, _, steps[i] = find_shortest_path(labyrinths[i], engine=engine, **engine_options)
+            metrics["single"] += len(indices)
+
+    padded = metrics["padded_cells"]
+    metrics["padding_waste"] = (padded - metrics["cells"]) / padded if padded else 0.0
+
+    return paths, steps, metrics
+
+
+# -------------------------
+# Process pool executor
+# -------------------------
+def solve_chunk(map_block: str, entries: list, engine: str, engine_options: dict) -> tuple:
+    """
+    Solve a chunk of the labyrinths stored in a shared memory block (worker side of `solve_many`).
+
+    The paths are written one after the other into a new shared memory block as int64 coordinates,
+    the caller reads it and unlinks it.
+
+    Args:
+        map_block (str): Name of the shared memory block holding the maps as int8 cells
+        entries (list): (index, offset, shape) of each labyrinth of the chunk in the block
+
+    Returns:
+        tuple: Name of the result block and (index, steps, path length, dimension) of each labyrinth
+    """
+    block = shared_memory.SharedMemory(name=map_block)
+    try:
+        cells = np.ndarray((block.size,), dtype=np.int8, buffer=block.buf)
+        labyrinths = [cells[offset:offset + int(np.prod(shape))].reshape(shape) for _, offset, shape in entries]
+        paths, steps, _ = solve_bucketed(labyrinths, engine=engine, **engine_options)
+        del cells, labyrinths  # release the views before closing the block
+    finally:
+        block.close()
+
+    coords = np.concatenate([np.empty(0, dtype=np.int64)] + [path.reshape(-1) for path in paths]).astype(np.int64)
+    result = shared_memory.SharedMemory(create=True, size=max(coords.nbytes, 1))
+    np.ndarray(coords.shape, dtype=np.int64, buffer=result.buf)[:] = coords
+    result.close()
+
+    return result.name, [(entry[0], int(step), *path.shape) for entry, step, path in zip(entries, steps, paths)]
+
+def read_chunk(result: tuple) -> list:
+    """Read and release the result block of `solve_chunk`, return (index, path, steps) tuples."""
+    name, summary = result
+    block = shared_memory.SharedMemory(name=name)
+    try:
+        total = sum(length * ndim for _, _, length, ndim in summary)
+        coords = np.ndarray((total,), dtype=np.int64, buffer=block.buf).astype(np.intp)  # copied out of the block
+    finally:
+        block.close()
+        block.unlink()
+
+    solved = []
+    position = 0
+    for index, steps, length, ndim in summary:
+        solved.append((index, coords[position:position + length * ndim].reshape(length, ndim), steps))
+        position += length * ndim
+    return solved
+
+def solve_many(labyrinths: list, workers: int = None, chunk_size: int = None, ordered: bool = True, mode: str = "processes", engine: str = "frontier", **engine_options):
+    """
+    Solve labyrinths on a pool of workers, streaming the results.
+
+    In "processes" mode, the maps are copied once into a shared memory block and the paths come back
+    through shared memory blocks too, so no array is pickled, only the small chunk descriptions.
+    "threads" mode runs in the calling process (see `solve_many_threaded`), for services that can't
+    fork. Each worker solves its chunks with `solve_bucketed`.
+
+    Args:
+        labyrinths (list): Labyrinth maps of any shapes, volumes included
+        workers (int): Number of workers. Default: the number of CPUs
+        chunk_size (int): Number of labyrinths sent to a worker at once. Default 64, see
+            `solve_many_threaded` for the threads mode
+        ordered (bool): If True, yield the results in input order, else as soon as their chunk is done
+        mode (str): "processes" or "threads". Default "processes"
+        engine (str): Engine for the maps solved one by one, see `solve_bucketed`. Default "frontier"
+        **engine_options: Extra keyword arguments given to the engine
+
+    Yields:
+        tuple: (index, path, steps) for each labyrinth, path being empty if there is none
+    """
+    if mode == "threads":
+        yield from solve_many_threaded(labyrinths, workers, chunk_size, ordered, engine, **engine_options)
+        return
+    if mode != "processes":
+        raise ValueError(f"Unknown mode '{mode}', expected 'processes' or 'threads'")
+    if chunk_size is None:
+        chunk_size = 64
+
+    sizes = [lab_map.size for lab_map in labyrinths]
+    offsets = np.concatenate([[0], np.cumsum(sizes)]).astype(int)
+
+    block = shared_memory.SharedMemory(create=True, size=max(int(offsets[-1]), 1))
+    try:
+        cells = np.ndarray((block.size,), dtype=np.int8, buffer=block.buf)
+        for lab_map, offset, size in zip(labyrinths, offsets, sizes):
+            cells[offset:offset + size] = lab_map.reshape(-1)
+        del cells
+
+        entries = [(i, int(offsets[i]), labyrinths[i].shape) for i in range(len(labyrinths))]
+        chunks = [entries[first:first + chunk_size] for first in range(0, len(entries), chunk_size)]
+
+        pool = ProcessPoolExecutor(max_workers=workers)
+        futures = [pool.submit(solve_chunk, block.name, chunk, engine, engine_options) for chunk in chunks]
+        read = set()
+        try:
+            for future in (futures if ordered else as_completed(futures)):
+                read.add(future)
+                yield from read_chunk(future.result())
+        finally:
+            # When the caller stops early, wait for the running chunks and release their result blocks
+            for future in futures:
+                future.cancel()
+            pool.shutdown(wait=True)
+            for future in futures:
+                if future not in read and not future.cancelled() and future.exception() is None:
+                    read_chunk(future.result())
+    finally:
+        block.close()
+        block.unlink()
+
+
+# -------------------------
+# Thread pool executor
+# -------------------------
+def gil_enabled() -> bool:
+    """Return False when running on a free-threaded Python build with the GIL disabled."""
+    is_gil_enabled = getattr(sys, "_is_gil_enabled", None)
+    return True if is_gil_enabled is None else is_gil_enabled()
+
+def solve_many_threaded(labyrinths: list, workers: int = None, chunk_size: int = None, ordered: bool = True, engine: str = "frontier", **engine_options):
+    """
+    Thread pool version of `solve_many`, nothing is copied or pickled.
+
+    With the GIL, only the NumPy array loops run in parallel, so the labyrinths are grouped by
+    bucket shape (see `bucket_shape`) before being chunked: the small maps of a chunk become a
+    single `find_shortest_path_batch` call made of large array operations, and the Python-heavy
+    per-step work is paid once per chunk instead of once per map. On free-threaded builds the
+    Python code runs in parallel too and smaller chunks balance the load better.
+
+    Args:
+        chunk_size (int): Number of labyrinths per chunk. Default 256 with the GIL, 64 without
+
+    Yields:
+        tuple: (index, path, steps) for each labyrinth, path being empty if there is none
+    """
+    if chunk_size is None:
+        chunk_size = 256 if gil_enabled() else 64
+
+    # Same-shape chunks, each one solved as a single batch where possible
+    order = sorted(range(len(labyrinths)), key=lambda i: bucket_shape(labyrinths[i].shape))
+    chunks = []
+    for i in order:
+        shape = bucket_shape(labyrinths[i].shape)
+        if not chunks or len(chunks[-1][1]) == chunk_size or chunks[-1][0] != shape:
+            chunks.append((shape, []))
+        chunks[-1][1].append(i)
+
+    def solve(chunk: list) -> list:
+        paths, steps, _ = solve_bucketed([labyrinths[i] for i in chunk], engine=engine, **engine_options)
+        return list(zip(chunk, paths, steps.tolist()))
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(solve, chunk) for _, chunk in chunks]
+        try:
+            pending = {}
+            next_index = 0
+            for future in as_completed(futures):
+                if not ordered:
+                    yield from future.result()
+                    continue
+
+                # Chunks are not in input order, hold the results until their turn comes
+                for index, path, steps in future.result():
+                    pending[index] = (path, steps)
+                while next_index in pending:
+                    yield (next_index, *pending.pop(next_index))
+                    next_index += 1
+        finally:
+            for future in futures:
+                future.cancel()
+
+
 if __name__ == "__main__":
     """
     Visualization Script
@@ -319,7 +2697,7 @@ if __name__ == "__main__":
     states = []
     # Find shortest path and store all propagation states
     path, propagation_time, reconstruction_time, steps = find_shortest_path(lab_map, visualize_freq=5, states=states)
-    if path:
+    if len(path):
         print(f"Path found in {steps} steps!")
         print("Shortest path:", path)
         print(f"Propagation time: {propagation_time / 1e6:.2f} ms")
@@ -333,9 +2711,7 @@ if __name__ == "__main__":
 
     l = np.zeros((s, s))
 
-    if path: 
-        for i, j in path:
-            l[i, j] = .5
+    l[path[:, 0], path[:, 1]] = .5
 
     states.append(l)
 
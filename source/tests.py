@@ -1,4 +1,6 @@
 import solver
+import heapq
+import time
 import numpy as np
 import matplotlib.pyplot as plt
 
@@ -13,6 +15,28 @@ def test_initialization():
 
     print(solver.initialize(lab_map))
 
+def test_engines(size=20, count=200):
+
+    maps = np.array([solver.generate_random_labyrinth(size, complexity=0.3) for _ in range(count)])
+
+    expected = []
+    for lab_map in maps:
+        path, elapsed1, elapsed2, step = solver.find_shortest_path(lab_map, engine="dense")
+        expected.append((len(path), step))
+
+    # The weighted engine defaults to unit costs, so every engine should take the same steps
+    for engine in solver.ENGINES:
+        mismatches = 0
+        for lab_map, (length, steps) in zip(maps, expected):
+            path, elapsed1, elapsed2, step = solver.find_shortest_path(lab_map, engine=engine)
+            if (len(path), step) != (length, steps):
+                mismatches += 1
+        print(f"{engine}: {mismatches}/{count} mismatches")
+
+    paths, elapsed1, elapsed2, steps = solver.find_shortest_path_batch(maps)
+    mismatches = sum(1 for path, step, (length, dense_steps) in zip(paths, steps, expected) if (len(path), step) != (length, dense_steps))
+    print(f"batch: {mismatches}/{count} mismatches")
+
 def test_speed(size=100, count=100):
 
     max_time = 0
@@ -58,5 +82,107 @@ def test_speed(size=100, count=100):
     print(f"Min time: {min_time // 1_000_000}ms")
     print(f"Total time: {total_time // 1_000_000}ms")
 
+def test_batch_speed(size=10, count=10000):
+
+    maps = np.array([solver.generate_random_labyrinth(size) for _ in range(count)])
+
+    paths, elapsed1, elapsed2, steps = solver.find_shortest_path_batch(maps)
+
+    print(f"Solved: {sum(1 for path in paths if len(path))}/{count}")
+    print(f"Max steps: {steps.max()}")
+    print(f"Propagation time: {elapsed1 // 1_000_000}ms")
+    print(f"Path building time: {elapsed2 // 1_000_000}ms")
+    print(f"Total time: {(elapsed1 + elapsed2) // 1_000_000}ms")
+
+def test_many_speed(size=10, count=10000, workers=None, mode="processes"):
+
+    maps = [solver.generate_random_labyrinth(size) for _ in range(count)]
+
+    start = time.time_ns()
+    solved = sum(1 for _, path, _ in solver.solve_many(maps, workers=workers, mode=mode) if len(path))
+    elapsed = time.time_ns() - start
+
+    print(f"Solved: {solved}/{count}")
+    print(f"Total time: {elapsed // 1_000_000}ms")
+
+def test_stripes(size=1000, stripe_counts=(1, 2, 4, 8, 16)):
+
+    lab_map = solver.generate_random_labyrinth(size)
+
+    for stripes in stripe_counts:
+        timings = []
+        path, elapsed1, elapsed2, step = solver.find_shortest_path(lab_map, engine="striped", stripes=stripes, timings=timings)
+
+        print(f"{stripes} stripes: {elapsed1 // 1_000_000}ms")
+        print(f"    per stripe: {', '.join(f'{t // 1_000_000}ms' for t in timings)}")
+
+def heap_dijkstra(lab_map, costs):
+
+    h, w = lab_map.shape
+    dist = {tuple(cell): 0 for cell in np.argwhere(lab_map == 2)}
+    heap = [(0, cell) for cell in dist]
+    heapq.heapify(heap)
+
+    while heap:
+        d, (x, y) = heapq.heappop(heap)
+        if d > dist[x, y]:
+            continue
+        if lab_map[x, y] == 3:
+            return d
+        for i, j in ((x-1, y), (x+1, y), (x, y-1), (x, y+1)):
+            if 0 <= i < h and 0 <= j < w and lab_map[i, j] != 0 and d + costs[i, j] < dist.get((i, j), d + costs[i, j] + 1):
+                dist[i, j] = d + costs[i, j]
+                heapq.heappush(heap, (dist[i, j], (i, j)))
+    return None
+
+def test_weighted_speed(size=600, max_cost=5):
+
+    lab_map = solver.generate_random_labyrinth(size, complexity=0.2)
+    costs = np.random.randint(1, max_cost + 1, size=lab_map.shape)
+
+    path, elapsed1, elapsed2, step = solver.find_shortest_path(lab_map, engine="weighted", costs=costs)
+    print(f"Weighted engine: {(elapsed1 + elapsed2) // 1_000_000}ms, cost {int(costs[path[1:, 0], path[1:, 1]].sum())}")
+
+    start = time.time_ns()
+    cost = heap_dijkstra(lab_map, costs)
+    print(f"Heap Dijkstra: {(time.time_ns() - start) // 1_000_000}ms, cost {cost}")
+
+def time_neighborhoods(maps, **engine_options):
+
+    for diagonal in (False, True):
+        total_time = 0
+        total_steps = 0
+        for lab_map in maps:
+            path, elapsed1, elapsed2, step = solver.find_shortest_path(lab_map, engine="frontier", diagonal=diagonal, **engine_options)
+            total_time += elapsed1 + elapsed2
+            total_steps += step
+
+        neighbors = len(solver.grid_stencil(maps[0].ndim, diagonal).offsets)
+        print(f"{neighbors} neighbors: {total_time // 1_000_000}ms, {total_steps} steps, {total_time // max(total_steps, 1) // 1_000}us per step")
+
+def test_diagonal(size=600, count=5, corners="allow"):
+
+    maps = [solver.generate_random_labyrinth(size, complexity=0.1) for _ in range(count)]
+
+    time_neighborhoods(maps, corners=corners)
+
+def test_voxels(size=200, floors=20, count=5, complexity=0.3):
+
+    volumes = []
+    for _ in range(count):
+        volume = np.where(np.random.rand(size, size, floors) < complexity, 0, 1)
+        volume[0, 0, 0] = 2
+        volume[-1, -1, -1] = 3
+        volumes.append(volume)
+
+    time_neighborhoods(volumes)
+
 #test_initialization()
+#test_engines()
+#test_batch_speed(10, 10000)
+#test_many_speed(10, 10000)
+#test_stripes()
+#test_weighted_speed()
+#test_diagonal()
+#test_voxels()
 test_speed(10, 10000)
\ No newline at end of file